@@ -0,0 +1,229 @@
+# acquisition.py
+# Reads raw PID values from the OBD connection for TelemetryBrain.
+import time
+import obd
+from obd.OBDCommand import OBDCommand
+from obd.protocols import ECU
+
+from obd_pids import DEFAULT_PIDS, DEFAULT_RATES, batch_command_bytes, decode_mode01
+
+
+def _decode_batch(messages):
+    """python-obd decoder for multi-PID responses: merges every ECU message into {name: value}"""
+    values = {}
+    for m in messages:
+        values.update(decode_mode01(m.data))
+    return values
+
+
+class PidReader:
+    # The ELM327 / SAE J1979 limit for PIDs in one Mode 01 request
+    MAX_BATCH = 6
+    # Empty batch answers in a row before we decide the ECU does not support batching
+    MAX_BATCH_FAILURES = 3
+
+    def __init__(self, names=None, batched=True, pacer=None):
+        self.names = list(names or DEFAULT_PIDS)
+        self.batched = batched
+        # Optional AdaptivePacer that gets the round trip of every query
+        self.pacer = pacer
+        self.batch_failures = 0
+        self.batch_rejected = False
+        # Batch commands are built once per PID combination and reused
+        self._batch_cmds = {}
+
+    def _batch_command(self, chunk):
+        key = tuple(chunk)
+        if key not in self._batch_cmds:
+            self._batch_cmds[key] = OBDCommand("BATCH_" + "_".join(chunk), "Multi-PID request",
+                                               batch_command_bytes(chunk), 0, _decode_batch, ECU.ENGINE, False)
+        return self._batch_cmds[key]
+
+    def reset(self):
+        """Call after a reconnect: a different ECU may accept batching again."""
+        self.batch_failures = 0
+        self.batch_rejected = False
+
+    def read(self, connection, names=None):
+        """
+        Returns {name: float or None} for every PID in names (default: all of self.names).
+        Uses batched requests when possible and fills any gaps with single queries.
+        """
+        names = self.names if names is None else names
+        values = {}
+        if self.batched and not self.batch_rejected:
+            values = self._read_batched(connection, names)
+
+        for name in names:
+            if values.get(name) is None:
+                values[name] = self._read_single(connection, name)
+        return values
+
+    def _read_batched(self, connection, names):
+        values = {}
+        for start in range(0, len(names), self.MAX_BATCH):
+            chunk = names[start:start + self.MAX_BATCH]
+            # An empty batch answer is a batching problem, not a busy ECU: do not back off for it
+            if hasattr(connection, "read_pids"):
+                answer = self._timed_raw(connection, chunk, count_no_data=False)
+            else:
+                # force=True: the synthetic batch command is never in supported_commands
+                r = self._timed_query(connection, self._batch_command(chunk), force=True, count_no_data=False)
+                answer = r.value if not r.is_null() and r.value else {}
+            values.update(answer)
+
+            # Only multi-PID requests tell whether the ECU batches: a lone PID is a plain query
+            if len(chunk) < 2:
+                continue
+            if answer:
+                self.batch_failures = 0
+            else:
+                self.batch_failures += 1
+                if self.batch_failures >= self.MAX_BATCH_FAILURES:
+                    print("⚠️ ECU rejected multi-PID requests. Falling back to single queries.")
+                    self.batch_rejected = True
+                    break
+        return values
+
+    def _read_single(self, connection, name):
+        if hasattr(connection, "read_pids"):
+            # RawELM327: plain floats, no OBDResponse or pint Quantity per value
+            return self._timed_raw(connection, [name]).get(name)
+        r = self._timed_query(connection, obd.commands[name])
+        return r.value.magnitude if not r.is_null() else None
+
+    def _timed_raw(self, connection, names, count_no_data=True):
+        start = time.monotonic()
+        values = connection.read_pids(names)
+        if self.pacer:
+            self.pacer.record(time.monotonic() - start, no_data=count_no_data and not values)
+        return values
+
+    def _timed_query(self, connection, cmd, force=False, count_no_data=True):
+        start = time.monotonic()
+        r = connection.query(cmd, force=force)
+        if self.pacer:
+            self.pacer.record(time.monotonic() - start, no_data=count_no_data and r.is_null())
+        return r
+
+
+class AdaptivePacer:
+    """
+    Paces the acquisition loop from the measured adapter round trip.
+    With a healthy adapter the loop runs back to back, capped at max_rate ticks/s.
+    Latency spikes or NO DATA answers add a backoff delay that doubles on every
+    bad query and decays away again once queries come back normal.
+    """
+    # A query this many times slower than the running average counts as a spike...
+    SPIKE_FACTOR = 3.0
+    # ...if it is also slower than this (s): microsecond jitter of a fast link is no stall
+    SPIKE_FLOOR = 0.02
+    # Backoff limits (seconds)
+    MIN_BACKOFF = 0.05
+    MAX_BACKOFF = 2.0
+    # Weight of the newest sample in the latency average (normal queries / spikes)
+    ALPHA = 0.1
+    SPIKE_ALPHA = 0.02
+
+    def __init__(self, max_rate=20.0):
+        self.max_rate = max_rate
+        self.latency = None    # Running average round trip (s)
+        self.last_latency = None
+        self.backoff = 0.0     # Extra delay per tick (s)
+        self.no_data_count = 0
+        self.spike_count = 0
+
+    def record(self, latency, no_data=False):
+        """Called after every query with its round trip time."""
+        self.last_latency = latency
+        spike = (self.latency is not None and latency > self.SPIKE_FLOOR
+                 and latency > self.SPIKE_FACTOR * self.latency)
+
+        if no_data or spike:
+            if no_data:
+                self.no_data_count += 1
+            else:
+                self.spike_count += 1
+            self.backoff = min(self.MAX_BACKOFF, max(self.MIN_BACKOFF, self.backoff * 2))
+        else:
+            # Recover gradually so one good answer does not slam the adapter again
+            self.backoff = self.backoff * 0.8 if self.backoff > 0.005 else 0.0
+
+        # Spikes only nudge the average, so one stall does not hide the next, but a
+        # lasting latency shift still becomes the new normal within a few dozen queries
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += (self.SPIKE_ALPHA if spike else self.ALPHA) * (latency - self.latency)
+
+    def delay(self, tick_start):
+        """Seconds to sleep so the tick that began at tick_start respects the ceiling and backoff."""
+        interval = 1.0 / self.max_rate + self.backoff
+        return max(0.0, tick_start + interval - time.monotonic())
+
+
+class PidScheduler:
+    """
+    Polls each PID at its own target rate (Hz) and caches the latest value.
+    Due PIDs are served earliest-deadline-first, so fast PIDs (RPM, SPEED, MAF)
+    keep most of the adapter bandwidth and slow ones (COOLANT) ride along
+    in the same batch when their turn comes.
+    """
+    # Cached values older than this many periods are reported as missing
+    STALE_PERIODS = 5
+
+    def __init__(self, reader, rates=None):
+        self.reader = reader
+        self.rates = dict(rates or DEFAULT_RATES)
+        self.periods = {name: 1.0 / hz for name, hz in self.rates.items()}
+        # Everything is due on the first poll
+        self.next_due = {name: 0.0 for name in self.rates}
+        # name: (value, monotonic time it was read)
+        self.cache = {}
+        # Monotonic time at which the latest poll's PIDs were read (request midpoint)
+        self.sample_time = None
+
+    def due(self, now):
+        """PIDs whose deadline has passed, most overdue first, at most one batch worth."""
+        late = [name for name, t in self.next_due.items() if t <= now]
+        late.sort(key=lambda name: self.next_due[name])
+        return late[:self.reader.MAX_BATCH]
+
+    def next_due_in(self, now=None):
+        """Seconds until the next PID is due (0 if something is already late)."""
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(self.next_due.values()) - now)
+
+    def poll(self, connection):
+        """
+        Queries the PIDs that are due and returns {name: (value, age_s)} for every PID.
+        Value is None if the PID was never read or its cache is stale.
+        """
+        now = time.monotonic()
+        names = self.due(now)
+        if names:
+            values = self.reader.read(connection, names)
+            done = time.monotonic()
+            # The ECU sampled somewhere inside the request window: the midpoint is the best guess
+            read_at = (now + done) / 2
+            self.sample_time = read_at
+            for name in names:
+                # Reschedule from the deadline, not from now, so the rate does not drift;
+                # but never let a PID build up a backlog of missed slots
+                next_due = self.next_due[name] + self.periods[name]
+                self.next_due[name] = next_due if next_due > now else now + self.periods[name]
+                if values[name] is not None:
+                    self.cache[name] = (values[name], read_at)
+            now = done
+
+        snapshot = {}
+        for name in self.rates:
+            if name in self.cache:
+                value, stamp = self.cache[name]
+                age = now - stamp
+                if age > self.STALE_PERIODS * self.periods[name]:
+                    value = None
+                snapshot[name] = (value, age)
+            else:
+                snapshot[name] = (None, None)
+        return snapshot
@@ -0,0 +1,51 @@
+# bench_batched_pids.py
+# End-to-end samples/s through the virtual ELM327 (elm_emulator.py) on a pty:
+# python-obd and RawELM327, single-PID vs batched Mode 01 requests.
+# Run from the repo root (Linux/macOS):  python -m benchmarks.bench_batched_pids
+import logging
+import time
+
+import obd
+
+from acquisition import PidReader
+from elm_emulator import ElmEmulator
+from elm_transport import RawELM327
+from obd_pids import DEFAULT_PIDS
+
+# Typical Bluetooth ELM327: ~35 ms per request/response round trip
+LATENCY = {"AT": 0.002, "01": 0.035}
+SAMPLES = 20
+
+
+def run(transport, batched, ecu_batch=True):
+    emulator = ElmEmulator(latency=LATENCY, batch=ecu_batch, seed=1)
+    port = emulator.start()
+    try:
+        connection = obd.OBD(port) if transport == "python-obd" else RawELM327(port)
+        assert connection.is_connected(), f"{transport} failed to connect to {port}"
+        reader = PidReader(batched=batched)
+
+        requests_before = emulator.requests
+        start = time.perf_counter()
+        for _ in range(SAMPLES):
+            values = reader.read(connection)
+        elapsed = time.perf_counter() - start
+        connection.close()
+
+        assert all(values[n] is not None for n in DEFAULT_PIDS), values
+        # A rejecting ECU must be detected, or every sample pays for the failed batches too
+        assert ecu_batch or not batched or reader.batch_rejected, "batch rejection not detected"
+        return SAMPLES / elapsed, (emulator.requests - requests_before) / SAMPLES
+    finally:
+        emulator.stop()
+
+
+if __name__ == "__main__":
+    logging.getLogger("obd").setLevel(logging.CRITICAL)
+    print(f"Emulated Mode 01 round trip: {LATENCY['01'] * 1000:.0f} ms, {SAMPLES} samples per row\n")
+    for transport in ("python-obd", "RawELM327"):
+        for label, batched, ecu_batch in [("single queries", False, True),
+                                          ("batched", True, True),
+                                          ("batched, ECU rejects", True, False)]:
+            rate, per_sample = run(transport, batched, ecu_batch)
+            print(f"{transport:10s} {label:22s} {rate:6.1f} samples/s  ({per_sample:.1f} requests/sample)")
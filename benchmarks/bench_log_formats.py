@@ -0,0 +1,67 @@
+# bench_log_formats.py
+# Log size and replay load time: CSV (as the replayer used to read it, parsed, and from its
+# .npy cache) vs binary .tlog.
+# The log is a simulated 20-minute drive at 20 samples/s, written the way DataLogger writes it.
+# Run from the repo root:  python -m benchmarks.bench_log_formats
+import csv
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import binlog
+from benchmarks.bench_process_batch import simulated_drive
+from brain import TelemetryBrain
+
+N = 24000
+
+
+def drive_rows(n):
+    raw, t = simulated_drive(n)
+    metrics = TelemetryBrain(log=False).process_batch(raw, t)
+    stamps = 1.7e9 + t
+    return np.column_stack((stamps, metrics)).tolist()
+
+
+def best_of(fn, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def load_csv_dictreader(path):
+    with open(path, "r") as f:
+        return list(csv.DictReader(f))
+
+
+if __name__ == "__main__":
+    rows = drive_rows(N)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "run.csv")
+        with open(csv_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(binlog.LOG_FIELDS)
+            writer.writerows(rows)
+        tlog_path = binlog.convert_csv(csv_path, keep_csv=True)
+
+        loaded = binlog.read_log(tlog_path)
+        assert len(loaded) == N
+        assert np.allclose(loaded["rpm"], [r[1] for r in rows], rtol=1e-6)
+
+        csv_size, tlog_size = os.path.getsize(csv_path), os.path.getsize(tlog_path)
+        print(f"{N} samples ({N / 20 / 60:.0f} min at 20 Hz)")
+        print(f"size   CSV {csv_size / 1e6:6.2f} MB   .tlog {tlog_size / 1e6:6.2f} MB   ({csv_size / tlog_size:.1f}x smaller)")
+        results = [
+            ("CSV, csv.DictReader (old replayer)", best_of(lambda: load_csv_dictreader(csv_path))),
+            ("CSV, binlog.read_csv", best_of(lambda: binlog.read_csv(csv_path))),
+            ("CSV, binlog.read_log (.npy cache)", best_of(lambda: binlog.read_log(csv_path))),
+            (".tlog, binlog.read_log", best_of(lambda: binlog.read_log(tlog_path))),
+            (".tlog, binlog.read_log(mmap=True)", best_of(lambda: binlog.read_log(tlog_path, mmap=True))),
+        ]
+        for label, seconds in results:
+            print(f"load   {label:36s} {seconds * 1000:9.2f} ms")
+        print(f"\nload speedup vs old replayer: .tlog {results[0][1] / results[3][1]:.0f}x, cached CSV {results[0][1] / results[2][1]:.0f}x")
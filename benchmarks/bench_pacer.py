@@ -0,0 +1,41 @@
+# bench_pacer.py
+# AdaptivePacer under scripted adapter latency profiles: the tick rate it settles at.
+# A lasting latency shift (slower adapter, or the drive simulator's warm-up) must not
+# leave the loop backed off: after the shift the pacer has to get back to max_rate.
+# Run from the repo root:  python -m benchmarks.bench_pacer
+from acquisition import AdaptivePacer
+
+MAX_RATE = 20.0
+QUERIES_PER_TICK = 2  # 7 PIDs = two batched requests
+TICKS = 400
+
+PROFILES = {
+    "steady 30 ms": lambda tick: 0.03,
+    "30 ms -> 100 ms for good": lambda tick: 0.03 if tick < 20 else 0.10,
+    "mock: 15 us -> 200 us": lambda tick: 15e-6 if tick == 0 else 200e-6,
+    "30 ms, one 1 s stall": lambda tick: 1.0 if tick == 100 else 0.03,
+}
+
+
+def run(profile):
+    """Tick rates (ticks/s) the pacer allows, one per tick."""
+    pacer = AdaptivePacer(MAX_RATE)
+    rates = []
+    for tick in range(TICKS):
+        latency = profile(tick)
+        for _ in range(QUERIES_PER_TICK):
+            pacer.record(latency)
+        interval = max(1.0 / pacer.max_rate + pacer.backoff, QUERIES_PER_TICK * latency)
+        rates.append(1.0 / interval)
+    return rates, pacer
+
+
+if __name__ == "__main__":
+    for name, profile in PROFILES.items():
+        rates, pacer = run(profile)
+        settled = sum(rates[-50:]) / 50
+        ceiling = min(MAX_RATE, 1.0 / (QUERIES_PER_TICK * profile(TICKS - 1)))
+        print(f"{name:26s} settled {settled:6.2f} ticks/s (ceiling {ceiling:5.2f})  "
+              f"min {min(rates):5.2f}  spikes {pacer.spike_count:3d}  backoff {pacer.backoff * 1000:5.1f} ms")
+        assert pacer.backoff == 0.0, f"{name}: still backed off by {pacer.backoff:.3f} s"
+        assert settled >= 0.99 * ceiling, f"{name}: settled at {settled:.2f} ticks/s"
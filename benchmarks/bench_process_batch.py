@@ -0,0 +1,59 @@
+# bench_process_batch.py
+# TelemetryBrain derived metrics: process_sample once per sample vs one process_batch call.
+# Input is a simulated drive (20 samples/s), so the 0-100 timer and fuel map get real work.
+# Run from the repo root:  python -m benchmarks.bench_process_batch
+import time
+
+import numpy as np
+
+from brain import TelemetryBrain
+from drive_sim import DriveSimulator
+from obd_pids import DEFAULT_PIDS
+
+SAMPLE_DT = 0.05
+N = 20000  # ~17 minutes of driving
+
+
+def simulated_drive(n, seed=0):
+    sim = DriveSimulator(seed=seed, sample_dt=SAMPLE_DT)
+    rows = [sim.read_pids(DEFAULT_PIDS) for _ in range(n)]
+    raw = {name: np.array([row[name] for row in rows]) for name in DEFAULT_PIDS}
+    t = np.arange(1, n + 1) * SAMPLE_DT
+    return raw, t
+
+
+def run_scalar(raw, t):
+    brain = TelemetryBrain(log=False)
+    names = list(raw)
+    columns = [raw[name].tolist() for name in names]
+    start = time.perf_counter()
+    out = [brain.process_sample(dict(zip(names, values)), ts) for ts, *values in zip(t.tolist(), *columns)]
+    return time.perf_counter() - start, np.array(out, dtype=float), brain
+
+
+def run_batch(raw, t):
+    brain = TelemetryBrain(log=False)
+    start = time.perf_counter()
+    out = brain.process_batch(raw, t)
+    return time.perf_counter() - start, out, brain
+
+
+if __name__ == "__main__":
+    raw, t = simulated_drive(N)
+
+    scalar_time, scalar_out, scalar_brain = run_scalar(raw, t)
+    batch_time, batch_out, batch_brain = run_batch(raw, t)
+
+    # Stability (column 9) comes from running sums on one path and prefix sums on the other
+    exact = [c for c in range(11) if c != 9]
+    assert np.array_equal(scalar_out[:, exact], batch_out[:, exact])
+    assert np.allclose(scalar_out[:, 9], batch_out[:, 9], rtol=1e-9, atol=1e-9)
+    assert np.array_equal(scalar_brain.maps.count, batch_brain.maps.count)
+    assert np.allclose(scalar_brain.maps.mean, batch_brain.maps.mean, rtol=1e-9)
+    assert np.allclose(scalar_brain.maps.m2, batch_brain.maps.m2, rtol=1e-6, atol=1e-9)
+    assert scalar_brain.leaderboard == batch_brain.leaderboard
+
+    print(f"{N} samples, {N * SAMPLE_DT / 60:.0f} min simulated drive")
+    print(f"process_sample loop {N / scalar_time:12,.0f} samples/s")
+    print(f"process_batch       {N / batch_time:12,.0f} samples/s")
+    print(f"\nspeedup: {scalar_time / batch_time:.1f}x (results match)")
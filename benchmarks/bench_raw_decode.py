@@ -0,0 +1,46 @@
+# bench_raw_decode.py
+# CPU cost of decoding one sample: python-obd (OBDResponse + pint) vs RawELM327 (plain floats).
+# Both paths start from the same adapter text, so only parsing/decoding is measured.
+# Run from the repo root:  python -m benchmarks.bench_raw_decode
+import timeit
+
+import obd
+from obd.protocols import ISO_15765_4_11bit_500k
+
+from elm_transport import parse_response
+from obd_pids import DEFAULT_PIDS, decode_mode01
+
+PROTOCOL = ISO_15765_4_11bit_500k(["7E8 06 41 00 BE 3F A8 13"])
+
+# One answer per PID, as the ELM327 prints it with headers on (python-obd) or off (raw)
+ANSWERS = {
+    "RPM": "0C 1A F8", "SPEED": "0D 32", "MAF": "10 01 F4", "COOLANT_TEMP": "05 7A",
+    "ENGINE_LOAD": "04 80", "SHORT_FUEL_TRIM_1": "06 84", "INTAKE_TEMP": "0F 41",
+}
+OBD_LINES = {n: [f"7E8 0{len(a.split()) + 1} 41 {a}"] for n, a in ANSWERS.items()}
+RAW_LINES = {n: ["41" + a.replace(" ", "")] for n, a in ANSWERS.items()}
+COMMANDS = {n: obd.commands[n] for n in DEFAULT_PIDS}
+
+
+def python_obd_sample():
+    # What obd.OBD.query() does after the serial read, plus the .magnitude access in the app
+    return {n: COMMANDS[n](PROTOCOL(OBD_LINES[n])).value.magnitude for n in DEFAULT_PIDS}
+
+
+def raw_sample():
+    values = {}
+    for n in DEFAULT_PIDS:
+        for payload in parse_response(RAW_LINES[n]):
+            values.update(decode_mode01(payload))
+    return values
+
+
+if __name__ == "__main__":
+    assert python_obd_sample() == raw_sample(), (python_obd_sample(), raw_sample())
+    N = 2000
+    results = {}
+    for label, fn in [("python-obd + pint", python_obd_sample), ("RawELM327", raw_sample)]:
+        best = min(timeit.repeat(fn, number=N, repeat=5)) / N
+        results[label] = best
+        print(f"{label:18s} {best * 1e6:8.1f} us/sample ({len(DEFAULT_PIDS)} PIDs)")
+    print(f"\nspeedup: {results['python-obd + pint'] / results['RawELM327']:.1f}x")
@@ -0,0 +1,33 @@
+# bench_time_to_first_sample.py
+# Connect + first sample through the virtual ELM327: full probe vs probe-cache hit.
+# Run from the repo root (Linux/macOS):  python -m benchmarks.bench_time_to_first_sample
+import logging
+import os
+import tempfile
+import time
+
+from acquisition import PidReader
+from elm_emulator import ElmEmulator
+from probe_cache import ProbeCache, connect
+
+LATENCY = {"AT": 0.002, "01": 0.035}
+
+
+def time_to_first_sample(port, raw, cache):
+    start = time.monotonic()
+    connection = connect(port, raw=raw, cache=cache)
+    assert connection.is_connected(), f"connect failed on {port}"
+    PidReader().read(connection)
+    elapsed = time.monotonic() - start
+    connection.close()
+    return elapsed
+
+
+if __name__ == "__main__":
+    logging.getLogger("obd").setLevel(logging.CRITICAL)
+    with ElmEmulator(latency=LATENCY) as port, tempfile.TemporaryDirectory() as tmp:
+        for transport, raw in (("python-obd", False), ("RawELM327", True)):
+            cache = ProbeCache(os.path.join(tmp, f"{transport}.json"))
+            cold = time_to_first_sample(port, raw, cache)
+            warm = time_to_first_sample(port, raw, cache)
+            print(f"{transport:10s} full probe {cold:5.2f}s   cached {warm:5.2f}s")
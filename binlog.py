@@ -0,0 +1,458 @@
+# binlog.py
+# Binary telemetry log (.tlog): a small self-describing JSON header followed by fixed-size
+# records (float64 timestamp + float32 metrics). Reads back as one NumPy structured array
+# with no per-field parsing, at roughly a quarter of the CSV size.
+# Convert old CSV logs:  python binlog.py TelemetryLogs/run_log_1700000000.csv [more.csv | dir ...]
+import csv
+import gzip
+import io
+import json
+import lzma
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b"TLOG1\n"
+EXTENSION = ".tlog"
+
+# Same columns as the CSV logs (DataLogger.headers)
+LOG_FIELDS = ["timestamp", "rpm", "speed", "hp", "torque", "ve", "fuel_rate", "coolant", "load",
+              "fuel_total", "stability", "temp_in"]
+# Wall-clock seconds need float64; float32 keeps ~7 digits, plenty for the metrics
+RECORD = np.dtype([("timestamp", "<f8")] + [(name, "<f4") for name in LOG_FIELDS[1:]])
+# Value for columns an older log does not have (temp_in before it was logged)
+DEFAULTS = {"temp_in": 25.0}
+# Closed log segments can be compressed; readers pick the codec from the suffix
+COMPRESSORS = {"gzip": (".gz", gzip.open), "lzma": (".xz", lzma.open)}
+# Parsed CSV logs are cached next to them as <log>.npy (the same structured array)
+CACHE_SUFFIX = ".npy"
+# A compressed .tlog is written as independent gzip/xz members of RESTART_ROWS records each;
+# <archive>.idx lists where each member starts, so a reader can start decompressing there
+RESTART_ROWS = 4096
+RESTART_SUFFIX = ".idx"
+RESTART = np.dtype([("record", "<i8"), ("offset", "<i8"), ("timestamp", "<f8")])
+# Files kept next to a log (<log><suffix>), removed with it
+SIDECARS = (CACHE_SUFFIX, RESTART_SUFFIX)
+
+
+def write_header(f, dtype=RECORD):
+    """Header: MAGIC, u32 length, JSON {"fields": [[name, dtype], ...]}, padded to 8 bytes."""
+    text = json.dumps({"fields": [[name, dtype[name].str] for name in dtype.names]}).encode()
+    header = MAGIC + struct.pack("<I", len(text)) + text
+    f.write(header.ljust(-(-len(header) // 8) * 8, b" "))
+
+
+def read_header(f):
+    """Returns (dtype, data offset) of an open .tlog file."""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("not a .tlog file")
+    (length,) = struct.unpack("<I", f.read(4))
+    fields = json.loads(f.read(length))["fields"]
+    offset = -(-(len(MAGIC) + 4 + length) // 8) * 8
+    return np.dtype([(name, code) for name, code in fields]), offset
+
+
+def encode_rows(rows, dtype=RECORD):
+    """List of [timestamp, metric...] rows -> record bytes."""
+    values = np.asarray(rows, dtype=float).reshape(len(rows), len(dtype.names))
+    records = np.empty(len(values), dtype=dtype)
+    for i, name in enumerate(dtype.names):
+        records[name] = values[:, i]
+    return records.tobytes()
+
+
+def _opener(path):
+    for suffix, opener in COMPRESSORS.values():
+        if path.endswith(suffix):
+            return opener
+    return None
+
+
+def read_log(path, mmap=False):
+    """
+    Any log (.tlog or .csv, optionally .gz/.xz) as a structured array with one field per column.
+    mmap=True maps an uncompressed .tlog (or a CSV's array cache) instead of reading it.
+    A CSV is parsed once into a .npy cache next to it (see csv_cache), later reads load that.
+    A record cut short by a crash at the end of a .tlog is ignored.
+    """
+    opener = _opener(path)
+    if not _is_tlog(path):
+        cache = csv_cache(path)
+        if cache:
+            return np.load(cache, mmap_mode="r" if mmap else None)
+        return _parse_csv(path)
+    if opener:
+        with opener(path, "rb") as f:
+            data = f.read()
+        dtype, offset = read_header(io.BytesIO(data))
+        return np.frombuffer(data, dtype=dtype, count=(len(data) - offset) // dtype.itemsize, offset=offset)
+    with open(path, "rb") as f:
+        dtype, offset = read_header(f)
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if mmap:
+        return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+    return np.fromfile(path, dtype=dtype, count=count, offset=offset)
+
+
+def _parse_csv(path):
+    opener = _opener(path)
+    if opener:
+        with opener(path, "rt", newline="") as f:
+            return read_csv(f)
+    return read_csv(path)
+
+
+def csv_cache(path):
+    """
+    Path of the .npy array cache of a CSV log, parsed and written on first use. The cache
+    carries the log's mtime and is rebuilt when they differ (log appended or replaced).
+    None if it cannot be written (read-only folder): callers parse the CSV instead.
+    """
+    cache = path + CACHE_SUFFIX
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        if os.path.exists(cache) and os.stat(cache).st_mtime_ns == mtime:
+            return cache
+        records = _parse_csv(path)
+        tmp = cache + ".tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, records)
+        os.utime(tmp, ns=(mtime, mtime))
+        os.replace(tmp, cache)
+        return cache
+    except OSError as e:
+        print(f"Log cache unavailable for {path}: {e}")
+        return None
+
+
+def remove_cache(path):
+    """Deletes the sidecars (array cache, restart points) of a log that was removed or replaced."""
+    for suffix in SIDECARS:
+        try:
+            os.remove(path + suffix)
+        except OSError:
+            pass
+
+
+def read_logs(paths):
+    """Several segments of one drive, in order, as one array."""
+    parts = [read_log(p) for p in paths]
+    return np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD)
+
+
+def read_csv(source):
+    """
+    A CSV log (path or open text file) as the same structured array (columns matched by
+    header name). A last row without its line end (app killed mid-write) is dropped, as
+    read_log drops a torn .tlog record.
+    """
+    f = open(source, "r", newline="") if isinstance(source, str) else source
+    try:
+        header = next(csv.reader(f))
+        lines = f.readlines()
+        if lines and not lines[-1].endswith("\n"):
+            lines.pop()
+        values = np.loadtxt(lines, delimiter=",", ndmin=2)
+    finally:
+        if f is not source:
+            f.close()
+    if not values.size:
+        return np.zeros(0, dtype=RECORD)
+    records = np.zeros(len(values), dtype=RECORD)
+    for name in RECORD.names:
+        if name in header:
+            records[name] = values[:, header.index(name)]
+        else:
+            records[name] = DEFAULTS.get(name, 0.0)
+    return records
+
+
+def _is_tlog(path):
+    opener = _opener(path)
+    return (path[:path.rindex(".")] if opener else path).endswith(EXTENSION)
+
+
+def _open_binary(path):
+    opener = _opener(path)
+    return opener(path, "rb") if opener else open(path, "rb")
+
+
+def _records_in_place(path):
+    """The log as an array read straight from disk (plain .tlog, or a CSV's cache), None for a compressed .tlog."""
+    if _is_tlog(path) and _opener(path):
+        return None
+    return read_log(path, mmap=True)
+
+
+def restart_points(path):
+    """
+    The member table of a compressed .tlog: one row per member (first record number, byte
+    offset, first timestamp) plus a final row (record count, file size, last timestamp).
+    None if the archive has none (compressed before restart points, or the table is stale).
+    """
+    try:
+        table = np.load(path + RESTART_SUFFIX)
+        if table.dtype == RESTART and len(table) and table["offset"][-1] == os.path.getsize(path):
+            return table
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _iter_records(f, dtype, chunk_rows):
+    block = chunk_rows * dtype.itemsize
+    while True:
+        data = f.read(block)
+        n = len(data) // dtype.itemsize
+        if n:
+            yield np.frombuffer(data, dtype=dtype, count=n)
+        if len(data) < block:
+            return
+
+
+def iter_log(path, chunk_rows=4096, start=0):
+    """
+    Streams a log (any format read_log accepts) as structured arrays of up to chunk_rows
+    records, so memory stays the same for a ten-minute or a ten-hour drive.
+    start: number of the record to begin at (from LogIndex.locate).
+    """
+    records = _records_in_place(path)
+    if records is not None:
+        for i in range(start, len(records), chunk_rows):
+            yield records[i:i + chunk_rows]
+        return
+
+    with _open_binary(path) as f:
+        dtype, offset = read_header(f)
+        table = restart_points(path) if start else None
+        if table is None:
+            f.seek(offset + start * dtype.itemsize) # Decompresses everything before start
+            yield from _iter_records(f, dtype, chunk_rows)
+            return
+    # Start decompressing at the member holding record `start` (the rest of the file
+    # reads on as one stream: members are concatenated)
+    member = int(np.searchsorted(table["record"][:-1], start, side="right")) - 1
+    with open(path, "rb") as raw:
+        raw.seek(int(table["offset"][member]))
+        with _opener(path)(raw, "rb") as f:
+            f.read((start - int(table["record"][member])) * dtype.itemsize)
+            yield from _iter_records(f, dtype, chunk_rows)
+
+
+def iter_logs(paths, chunk_rows=4096, start=0):
+    """iter_log over the segments of one drive, in order (start applies to the first one)."""
+    for path in paths:
+        yield from iter_log(path, chunk_rows, start)
+        start = 0
+
+
+class LogIndex:
+    """
+    Sparse time index of one log: the timestamp of every STRIDE-th record, so a seek is a
+    binary search plus reading at most STRIDE records. A plain .tlog or CSV cache only has
+    those timestamps read (memory-mapped). A compressed .tlog uses its restart points (one
+    per member, so a seek decompresses at most one member); older archives are scanned once.
+    """
+    STRIDE = 256
+
+    def __init__(self, path):
+        self.path = path
+        records = _records_in_place(path)
+        table = restart_points(path) if records is None else None
+        if records is not None:
+            self.count = len(records)
+            self.times = np.array(records["timestamp"][::self.STRIDE], dtype=float)
+            self.records = np.arange(0, self.count, self.STRIDE)
+            self.end = float(records["timestamp"][-1]) if self.count else None
+            del records
+        elif table is not None:
+            self.count = int(table["record"][-1])
+            self.times = table["timestamp"][:-1].astype(float)
+            self.records = table["record"][:-1]
+            self.end = float(table["timestamp"][-1]) if self.count else None
+        else:
+            times, self.count, self.end = [], 0, None
+            for chunk in iter_log(path, chunk_rows=16 * self.STRIDE):
+                times.extend(chunk["timestamp"][::self.STRIDE])
+                self.count += len(chunk)
+                self.end = float(chunk["timestamp"][-1])
+            self.times = np.asarray(times, dtype=float)
+            self.records = np.arange(0, self.count, self.STRIDE)
+        self.start = float(self.times[0]) if self.count else None
+
+    def locate(self, t):
+        """Number of the indexed record at or just before log time t."""
+        return int(self.records[max(0, int(np.searchsorted(self.times, t, side="right")) - 1)])
+
+
+# path -> (mtime, size, LogIndex): built on first open, rebuilt if the file changed
+_indexes = {}
+
+
+def log_index(path):
+    st = os.stat(path)
+    cached = _indexes.get(path)
+    if cached and cached[:2] == (st.st_mtime, st.st_size):
+        return cached[2]
+    index = LogIndex(path)
+    _indexes[path] = (st.st_mtime, st.st_size, index)
+    return index
+
+
+class LogCursor:
+    """
+    Reader over a drive for playback: peek() at the next record, advance_to(t) to consume
+    everything recorded up to log time t, seek(t) to jump anywhere (back or forward).
+    position is the number of the next record, counted from the start of the drive.
+    """
+
+    def __init__(self, paths, chunk_rows=4096):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths = list(paths)
+        self.chunk_rows = chunk_rows
+        self.position = 0
+        self._chunks = iter_logs(self.paths, chunk_rows)
+        self._chunk = None
+        self._i = 0
+
+    def _fill(self):
+        while self._chunk is None or self._i >= len(self._chunk):
+            self._chunk = next(self._chunks, None)
+            self._i = 0
+            if self._chunk is None:
+                return False
+        return True
+
+    def peek(self):
+        """Next record (np.void, fields by name) or None at the end of the drive."""
+        return self._chunk[self._i] if self._fill() else None
+
+    def advance_to(self, t):
+        """Consumes the records with timestamp <= t. Returns (last consumed record or None, count)."""
+        last, count = None, 0
+        while self._fill():
+            # Records are in time order: binary search instead of a row-by-row loop
+            end = max(self._i, int(np.searchsorted(self._chunk["timestamp"], t, side="right")))
+            if end > self._i:
+                last = self._chunk[end - 1]
+                count += end - self._i
+                self._i = end
+            if self._i < len(self._chunk):
+                break
+        self.position += count
+        return last, count
+
+    def span(self):
+        """(first, last) timestamp of the drive; builds the segment indexes if needed."""
+        indexes = [index for index in map(log_index, self.paths) if index.count]
+        return (indexes[0].start, indexes[-1].end) if indexes else (None, None)
+
+    def seek(self, t):
+        """
+        Moves to the first record with timestamp >= t. The segment indexes are built on the
+        first seek (cached afterwards), then each seek is a binary search and one chunk read
+        (plus at most one compressed member).
+        """
+        indexes = [log_index(p) for p in self.paths]
+        segment, before = 0, 0
+        for i, index in enumerate(indexes):
+            if index.count and index.start <= t:
+                segment, before = i, sum(ix.count for ix in indexes[:i])
+        record = indexes[segment].locate(t) if indexes[segment].count else 0
+        self._chunks = iter_logs(self.paths[segment:], self.chunk_rows, record)
+        self._chunk = None
+        self._i = 0
+        self.position = before + record
+        # Skip the records between the index point and t (at most STRIDE, or one member)
+        while self._fill():
+            self._i = max(self._i, int(np.searchsorted(self._chunk["timestamp"], t, side="left")))
+            self.position = before + record + self._i
+            if self._i < len(self._chunk):
+                break
+            record += len(self._chunk)
+        return self.peek()
+
+
+def compress_file(path, method="gzip"):
+    """
+    Replaces a closed log file with path + .gz/.xz (written to a temp file first). Returns
+    the new path. A .tlog is written as members of RESTART_ROWS records, listed in <archive>.idx.
+    """
+    suffix, opener = COMPRESSORS[method]
+    out_path = path + suffix
+    tmp = out_path + ".tmp"
+    if not _is_tlog(path):
+        with open(path, "rb") as src, opener(tmp, "wb") as dst:
+            while True:
+                block = src.read(1 << 20)
+                if not block:
+                    break
+                dst.write(block)
+    else:
+        with open(path, "rb") as src:
+            dtype, offset = read_header(src)
+        records = np.memmap(path, dtype=dtype, mode="r", offset=offset,
+                            shape=((os.path.getsize(path) - offset) // dtype.itemsize,))
+        table = []
+        with open(path, "rb") as src, open(tmp, "wb") as raw:
+            # Header in a member of its own, so each data member starts on a record
+            with opener(raw, "wb") as dst:
+                dst.write(src.read(offset))
+            for start in range(0, len(records), RESTART_ROWS):
+                chunk = records[start:start + RESTART_ROWS]
+                table.append((start, raw.tell(), chunk["timestamp"][0]))
+                with opener(raw, "wb") as dst:
+                    dst.write(chunk.tobytes())
+            table.append((len(records), raw.tell(), records["timestamp"][-1] if len(records) else 0.0))
+        del records
+        with open(out_path + RESTART_SUFFIX + ".tmp", "wb") as f:
+            np.save(f, np.array(table, dtype=RESTART))
+        os.replace(out_path + RESTART_SUFFIX + ".tmp", out_path + RESTART_SUFFIX)
+    os.replace(tmp, out_path)
+    os.remove(path)
+    remove_cache(path)
+    return out_path
+
+
+def convert_csv(csv_path, out_path=None, keep_csv=False):
+    """
+    Writes csv_path as a .tlog next to it (or at out_path) and, once the .tlog reads back
+    identical, deletes the CSV (keep_csv=False), so a drive is never listed twice. A
+    mismatch removes the .tlog again and raises ValueError, the CSV stays. Returns the new path.
+    """
+    out_path = out_path or os.path.splitext(csv_path)[0] + EXTENSION
+    records = read_csv(csv_path)
+    tmp = out_path + ".tmp"
+    with open(tmp, "wb") as f:
+        write_header(f)
+        f.write(records.tobytes())
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, out_path)
+    if not keep_csv:
+        written = read_log(out_path)
+        if len(written) != len(records) or written.tobytes() != records.tobytes():
+            os.remove(out_path)
+            raise ValueError(f"{out_path} does not read back as {csv_path}, CSV kept")
+        os.remove(csv_path)
+        remove_cache(csv_path)
+    return out_path
+
+
+if __name__ == "__main__":
+    paths = []
+    for arg in sys.argv[1:]:
+        if os.path.isdir(arg):
+            paths += sorted(os.path.join(arg, n) for n in os.listdir(arg) if n.endswith(".csv"))
+        else:
+            paths.append(arg)
+    for path in paths:
+        try:
+            size = os.path.getsize(path)
+            out = convert_csv(path)
+            print(f"{path} -> {out} ({size / max(1, os.path.getsize(out)):.1f}x smaller, CSV removed)")
+        except (OSError, ValueError) as e:
+            print(f"Skipped {path}: {e}")
@@ -0,0 +1,307 @@
+# brain.py
+# Telemetry math (HP, torque, VE, fuel, stability, 0-100 timer, fuel map) and the
+# diagnosis rules. No kivy imports, so benchmarks and headless tools can use it too.
+import time
+import numpy as np
+
+from logger import DataLogger
+from acquisition import PidReader, PidScheduler, AdaptivePacer
+from resample import SignalResampler
+from rolling import RollingStats
+from maps import Axis, MapEngine
+from map_store import MapStore, map_path
+
+# -------------------------------------------------------------------------
+# LOGIC CORE: Calculates physics and stores history
+# -------------------------------------------------------------------------
+class CarDoctor:
+    @staticmethod
+    def diagnose(metrics):
+        """
+        Analyzes metrics and returns a 'Prescription' (Recommendation string)
+        metrics: [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, cum_fuel, stability. temp_in]
+        """
+        rpm, speed, hp, torque, ve, fuel, coolant, load, total_fuel, stability, temp_in = metrics
+        
+        advice = "System Normal"
+        severity = 0 # 0=Green, 1=Yellow, 2=Red
+
+        # 1. Warmup Protection
+        if coolant < 70:
+            advice = "⚠️ Engine Cold: Limit RPM < 3000"
+            severity = 1
+            if rpm > 3500:
+                advice = "⛔ CRITICAL: HIGH RPM ON COLD ENGINE!"
+                severity = 2
+
+        # 2. Overheat Warning
+        elif coolant > 105:
+            advice = "⛔ OVERHEATING: Check Airflow / Coolant"
+            severity = 2
+        
+        # 3. Efficiency Trainer (Highway Cruising)
+        elif speed > 80 and load < 30 and rpm > 3000:
+            advice = "💡 Shift Up to Save Fuel"
+            severity = 0
+            
+        # 4. Stability Check (Rough Idle or Misfire)
+        elif speed < 5 and stability > 3.0:
+            advice = "⚠️ Rough Idle Detected: Check Spark/Fuel"
+            severity = 1
+
+        return advice, severity
+
+class TelemetryBrain:
+    # Longer gaps between samples (reconnect, stall) are not integrated over
+    MAX_DT = 1.0
+    # Seconds of driving between learned-map saves (only changed cells are written)
+    MAP_SAVE_INTERVAL = 10.0
+
+    def __init__(self, displacement=2.0, batched=True, pid_rates=None, max_rate=20.0, resample_rate=20.0,
+                 log=True, fuel_map_decay=None, vehicle=None):
+        self.displacement = displacement
+        self.cum_fuel = 0
+        self.last_fuel_rate = 0
+        self.perf_running = False
+        self.perf_start_time = None
+        self.leaderboard = []
+        
+        # Logger (log=False: no CSV file at all, e.g. benchmarks)
+        self.logger = DataLogger() if log else None
+        self.logging_active = log
+
+        # PID acquisition: batched Mode 01 requests, each PID polled at its own rate,
+        # loop paced from the measured adapter latency (max_rate = ticks/s ceiling)
+        self.pacer = AdaptivePacer(max_rate)
+        self.reader = PidReader(batched=batched, pacer=self.pacer)
+        self.scheduler = PidScheduler(self.reader, pid_rates)
+        self.pid_ages = {} # Seconds since each PID was last read from the ECU
+
+        # Time alignment: PIDs arrive at different rates, so the math runs on interpolated
+        # frames at resample_rate (None = use each poll's raw values as-is)
+        self.resampler = SignalResampler(self.scheduler.rates, rate=resample_rate) if resample_rate else None
+        self.metrics = [0]*11 # Latest computed metrics
+
+        # Sample timing: monotonic time the current sample's PIDs were read, and the step since the last one
+        self.sample_time = None
+        self.last_dt = 0.0
+
+        # Buffers for smoothing
+        self.connection = None
+        # Fuel trim spread over the last 40 samples (stability)
+        self.trim_stats = RollingStats(size=40)
+        
+        # Learned maps: each cell keeps count/mean/variance of its channel
+        # (fuel_map_decay e.g. 0.99 = slowly forget old samples)
+        self.maps = MapEngine()
+        rpm_axis = Axis("rpm", 250, 7500)
+        load_axis = Axis("load", 5, 100)
+        self.fuel_map = self.maps.register("fuel", "fuel_rate", [load_axis, rpm_axis], decay=fuel_map_decay)
+        self.maps.register("ve", "ve", [load_axis, rpm_axis], decay=fuel_map_decay)
+        self.maps.register("trim", "trim", [load_axis, rpm_axis], decay=fuel_map_decay)
+        # No gear PID: RPM per km/h tells the gears apart (~125 in 1st, ~30 in 5th)
+        self.maps.register("fuel_gear", "fuel_rate", [Axis("rpm_per_kph", 10, 150), Axis("speed", 10, 200)],
+                           decay=fuel_map_decay)
+        # Per-vehicle persistence: pick up where the last drive left off (vehicle=None: memory only)
+        self.map_store = MapStore(map_path(vehicle)).attach(self.maps) if vehicle else None
+        self.maps_saved_at = None
+
+    def process_data(self, connection):
+        """
+        This method is designed to be run in a BACKGROUND THREAD.
+        It queries the OBD port (blocking operation) and returns calculated metrics.
+        """
+        if not connection or not connection.is_connected():
+            return [0]*10
+
+        # Query OBD (These take time!)
+        # Only the PIDs that are due get queried; slow ones come from the scheduler cache
+        snapshot = self.scheduler.poll(connection)
+        self.pid_ages = {name: age for name, (value, age) in snapshot.items()}
+        if self.resampler is None:
+            raw = {name: value for name, (value, age) in snapshot.items()}
+            self.metrics = self.process_sample(raw, self.scheduler.sample_time)
+            return self.metrics
+
+        # Feed every reading with its own read time, then run the math on each aligned frame.
+        # PIDs the scheduler reports as stale (NO DATA for a while) are dropped, not held
+        for name, (value, age) in snapshot.items():
+            if value is None:
+                self.resampler.clear(name)
+            else:
+                self.resampler.add(name, self.scheduler.cache[name][1], value)
+        for t, frame in self.resampler.frames():
+            self.metrics = self.process_sample(frame, t)
+        return self.metrics
+
+    def process_sample(self, raw, t):
+        """
+        Turns one sample of raw PID values ({name: value or None}) read at
+        monotonic time t into the 11-item metrics list. Integrators and timers use the real dt.
+        """
+        dt = t - self.sample_time if self.sample_time is not None else 0.0
+        if not 0 <= dt <= self.MAX_DT:
+            dt = 0.0 # First sample, or a gap: nothing to integrate across
+        self.sample_time = t
+        self.last_dt = dt
+
+        # Extract values safely
+        rpm = raw["RPM"] or 0
+        speed = raw["SPEED"] or 0
+        maf = raw["MAF"] or 0
+        coolant = raw["COOLANT_TEMP"] or 0
+        load = raw["ENGINE_LOAD"] or 0
+        trim = raw["SHORT_FUEL_TRIM_1"] or 0
+        intake = raw["INTAKE_TEMP"] or 0
+        temp_in = raw["INTAKE_TEMP"] if raw["INTAKE_TEMP"] is not None else 25
+
+        # --- Calculations ---
+        hp = maf * 1.32
+        # Torque (Nm) = (HP * 5252 / RPM) * 1.3558 (conversion to Nm)
+        # Simplified: (HP * 7120) / RPM
+        torque = (hp * 7127) / rpm if rpm > 500 else 0
+        
+        # Air Density for VE calc
+        density = 1.225 * 288.15 / (273.15 + intake)
+        
+        # Volumetric Efficiency
+        ve = 0
+        if rpm > 400:
+            theoretical_flow = (rpm * (self.displacement/1000) * density) / 120 * 1000
+            ve = (maf / theoretical_flow) * 100
+
+        # Fuel Rate (Liters per hour)
+        fuel_rate = (maf * 3600) / (14.7 * 740)
+        # Trapezoid over the real time step (L/h * s / 3600 = L)
+        self.cum_fuel += (fuel_rate + self.last_fuel_rate) / 2 * dt / 3600
+        self.last_fuel_rate = fuel_rate
+
+        # Stability (Fuel Trim Standard Deviation)
+        self.trim_stats.add(trim)
+        stability = self.trim_stats.std if self.trim_stats.count > 5 else 0
+
+        # 0-100 Performance Timer
+        if not self.perf_running and 2 < speed < 8:
+            self.perf_running = True
+            self.perf_start_time = t
+        elif self.perf_running and speed >= 100:
+            elapsed = t - self.perf_start_time
+            self.leaderboard.append(elapsed)
+            self.leaderboard = sorted(self.leaderboard)[:3] # Keep top 3
+            self.perf_running = False
+
+        # Update Fuel Map Learning
+        self.maps.update({
+            "rpm": rpm, "load": load, "speed": speed, "fuel_rate": fuel_rate, "ve": ve,
+            "trim": raw["SHORT_FUEL_TRIM_1"],
+            "rpm_per_kph": rpm / speed if speed > 5 else None,
+        })
+
+        current_metrics = [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, self.cum_fuel, stability, temp_in]
+        self._save_maps(t)
+
+        # --- LOGGING INTEGRATION ---
+        if self.logging_active and rpm > 0: # Only log if engine is running
+            # Stamp the row with when the PIDs were read, not when the math finished
+            self.logger.log_sample(current_metrics, timestamp=time.time() - (time.monotonic() - t))
+
+        return current_metrics
+
+    def process_batch(self, raw, t):
+        """
+        Vectorized process_sample for many samples at once (log reprocessing, simulators).
+        raw: {name: array of PID values, NaN = no reading}, t: array of monotonic read times.
+        Returns an (n, 11) array, one metrics row per sample, identical to calling
+        process_sample on each sample in order (stability and maps up to float rounding).
+        Brain state (fuel total, stability window, 0-100 timer, maps) carries over the same way.
+        """
+        t = np.asarray(t, dtype=float)
+        n = len(t)
+        if n == 0:
+            return np.zeros((0, 11))
+
+        def column(name):
+            return np.asarray(raw[name], dtype=float)
+
+        # NaN (no reading) -> 0, like `raw[name] or 0`
+        rpm, speed, maf, coolant, load, trim, intake = (
+            np.nan_to_num(column(name)) for name in
+            ("RPM", "SPEED", "MAF", "COOLANT_TEMP", "ENGINE_LOAD", "SHORT_FUEL_TRIM_1", "INTAKE_TEMP"))
+        temp_in = np.where(np.isnan(column("INTAKE_TEMP")), 25.0, intake)
+
+        # Time steps, with gaps (and the very first sample) not integrated across
+        prev = self.sample_time if self.sample_time is not None else np.nan
+        dt = np.diff(t, prepend=prev)
+        dt[~((dt >= 0) & (dt <= self.MAX_DT))] = 0.0
+
+        # --- Calculations (same formulas and operation order as process_sample) ---
+        hp = maf * 1.32
+        torque = np.zeros(n)
+        fast = rpm > 500
+        torque[fast] = (hp[fast] * 7127) / rpm[fast]
+
+        density = 1.225 * 288.15 / (273.15 + intake)
+        ve = np.zeros(n)
+        turning = rpm > 400
+        theoretical_flow = (rpm[turning] * (self.displacement/1000) * density[turning]) / 120 * 1000
+        ve[turning] = (maf[turning] / theoretical_flow) * 100
+
+        fuel_rate = (maf * 3600) / (14.7 * 740)
+        prev_rate = np.concatenate(([self.last_fuel_rate], fuel_rate[:-1]))
+        steps = (fuel_rate + prev_rate) / 2 * dt / 3600
+        # Sequential running sum starting from the current total (same rounding as +=)
+        cum_fuel = np.cumsum(np.concatenate(([self.cum_fuel], steps)))[1:]
+
+        count, _, trim_std = self.trim_stats.extend(trim)
+        stability = np.where(count > 5, trim_std, 0.0)
+
+        # 0-100 timer: a state machine, but only samples in the start/finish speed bands matter
+        for i in np.flatnonzero(((speed > 2) & (speed < 8)) | (speed >= 100)):
+            if not self.perf_running and 2 < speed[i] < 8:
+                self.perf_running = True
+                self.perf_start_time = t[i]
+            elif self.perf_running and speed[i] >= 100:
+                self.leaderboard.append(t[i] - self.perf_start_time)
+                self.leaderboard = sorted(self.leaderboard)[:3]
+                self.perf_running = False
+
+        rpm_per_kph = np.full(n, np.nan)
+        moving = speed > 5
+        rpm_per_kph[moving] = rpm[moving] / speed[moving]
+        self.maps.update_batch({
+            "rpm": rpm, "load": load, "speed": speed, "fuel_rate": fuel_rate, "ve": ve,
+            "trim": column("SHORT_FUEL_TRIM_1"), "rpm_per_kph": rpm_per_kph,
+        })
+
+        metrics = np.column_stack((rpm, speed, hp, torque, ve, fuel_rate, coolant, load,
+                                   cum_fuel, stability, temp_in))
+
+        self.sample_time = t[-1]
+        self.last_dt = dt[-1]
+        self.cum_fuel = cum_fuel[-1]
+        self.last_fuel_rate = fuel_rate[-1]
+        self.metrics = metrics[-1].tolist()
+        self._save_maps(t[-1])
+
+        if self.logging_active:
+            wall_offset = time.time() - time.monotonic()
+            for i in np.flatnonzero(rpm > 0):
+                self.logger.log_sample(metrics[i].tolist(), timestamp=wall_offset + t[i])
+
+        return metrics
+
+    def _save_maps(self, t):
+        if self.map_store is None:
+            return
+        if self.maps_saved_at is None:
+            self.maps_saved_at = t
+        elif t - self.maps_saved_at >= self.MAP_SAVE_INTERVAL:
+            self.map_store.checkpoint()
+            self.maps_saved_at = t
+
+    def close(self):
+        """Saves what is left of the learned maps and the log queue (app exit)."""
+        if self.map_store is not None:
+            self.map_store.close()
+        if self.logger is not None:
+            self.logger.close()
@@ -6,6 +6,7 @@ source.dir = .
 android.api = 33
 android.permissions = BLUETOOTH, BLUETOOTH_ADMIN, BLUETOOTH_SCAN, BLUETOOTH_CONNECT, ACCESS_FINE_LOCATION
 source.include_exts = py,png,jpg,kv,txt
+source.exclude_dirs = benchmarks
 version = 1.0
 requirements = python3,kivy,numpy,obd,pyserial,pint,flexcache,flexparser,typing_extensions,platformdirs,packaging,pyjnius,setuptools, requests
 orientation = portrait
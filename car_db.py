@@ -128,12 +128,12 @@ class CarDatabase:
         return [f"{query.capitalize()} (Cloud Verified)"]
 
     def get_specs(self, car_name):
-        self.cursor.execute("SELECT cc, fuel, weight FROM cars WHERE model = ?", (car_name,))
+        self.cursor.execute("SELECT cc, fuel, weight, drag_coeff FROM cars WHERE model = ?", (car_name,))
         row = self.cursor.fetchone()
         if row:
-            return {"cc": row[0], "fuel": row[1], "weight": row[2]}
+            return {"cc": row[0], "fuel": row[1], "weight": row[2], "drag": row[3]}
         else:
             if row:
-                return {"cc": 2000, "fuel": "Petrol", "weight": 1500}
+                return {"cc": 2000, "fuel": "Petrol", "weight": 1500, "drag": 0.32}
             else:
                 return None
\ No newline at end of file
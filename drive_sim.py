@@ -0,0 +1,226 @@
+# drive_sim.py
+# Physics-based drive simulator: a lightweight connection that replaces the old
+# MagicMock mock mode. RPM, speed, MAF and load all come from one vehicle model
+# (gears, throttle, drag, mass), so the fuel map, stability window and 0-100 timer
+# see realistic signals. Same seed -> same drive.
+import math
+import random
+import time
+
+from elm_transport import RawResponse, RawValue
+from obd_pids import PID_TABLE
+
+GRAVITY = 9.81
+AIR_DENSITY = 1.2       # kg/m^3 at ~20°C, used for aero drag
+AMBIENT_TEMP = 25.0     # °C
+
+
+class VehicleModel:
+    """Static vehicle parameters. Mass and drag come from car_db when available."""
+
+    def __init__(self, mass=1500, drag_coeff=0.32, displacement=2.0, frontal_area=2.2,
+                 gear_ratios=(3.6, 2.1, 1.4, 1.0, 0.8), final_drive=4.1, tire_radius=0.31,
+                 idle_rpm=800, redline=6800):
+        self.mass = mass
+        self.drag_coeff = drag_coeff
+        self.displacement = displacement
+        self.frontal_area = frontal_area
+        self.gear_ratios = gear_ratios
+        self.final_drive = final_drive
+        self.tire_radius = tire_radius
+        self.idle_rpm = idle_rpm
+        self.redline = redline
+        # Naturally aspirated ballpark: ~100 Nm per litre
+        self.peak_torque = 100 * displacement
+
+    @classmethod
+    def from_specs(cls, specs):
+        """Builds a model from a CarDatabase.get_specs() dict (None -> defaults)."""
+        if not specs:
+            return cls()
+        return cls(mass=specs.get("weight") or 1500,
+                   drag_coeff=specs.get("drag") or 0.32,
+                   displacement=(specs.get("cc") or 2000) / 1000.0)
+
+    def torque(self, rpm, throttle):
+        """Engine torque (Nm) at the crank. Negative = engine braking."""
+        curve = max(0.5, 1 - ((rpm - 4000) / 4500) ** 2)
+        braking = 0.1 * self.peak_torque * rpm / self.redline
+        return throttle * self.peak_torque * curve - (1 - throttle) * braking
+
+
+class DriverScript:
+    """
+    Seeded driver: idles, launches, cruises and brakes in a random but repeatable order.
+    Returns (throttle 0..1, brake 0..1) for the current speed.
+    """
+
+    def __init__(self, seed=0):
+        self.rng = random.Random(seed)
+        self.phase = "idle"
+        self.phase_time = 0.0
+        self.phase_length = 3.0
+        self.target_kph = 0.0
+
+    def _next_phase(self, speed_kph):
+        if self.phase in ("idle", "brake"):
+            # Full or part throttle pull up to a target speed (often past 100 for the timer)
+            self.phase = "launch"
+            self.target_kph = self.rng.choice([60, 80, 110, 130])
+            self.throttle_level = self.rng.choice([0.5, 0.8, 1.0])
+            self.phase_length = 60.0
+        elif self.phase == "launch":
+            self.phase = "cruise"
+            self.phase_length = self.rng.uniform(10, 40)
+        else:
+            stop = self.rng.random() < 0.4
+            self.phase = "brake"
+            self.target_kph = 0.0 if stop else self.rng.choice([30, 50, 70])
+            self.brake_level = self.rng.uniform(0.2, 0.6)
+            self.phase_length = 60.0
+        self.phase_time = 0.0
+
+    def step(self, dt, speed_kph):
+        self.phase_time += dt
+        if self.phase == "idle":
+            done = self.phase_time >= self.phase_length
+            control = (0.0, 0.3)
+        elif self.phase == "launch":
+            done = speed_kph >= self.target_kph or self.phase_time >= self.phase_length
+            control = (self.throttle_level, 0.0)
+        elif self.phase == "cruise":
+            done = self.phase_time >= self.phase_length
+            # Proportional cruise control around a road-load baseline
+            control = (min(1.0, max(0.0, 0.18 + 0.05 * (self.target_kph - speed_kph))), 0.0)
+        else:
+            done = speed_kph <= self.target_kph + 1 or self.phase_time >= self.phase_length
+            control = (0.0, self.brake_level)
+            if done and self.target_kph == 0:
+                self.phase = "idle"
+                self.phase_time = 0.0
+                self.phase_length = self.rng.uniform(2, 8)
+                return control
+
+        if done:
+            self._next_phase(speed_kph)
+        return control
+
+
+class DriveSimulator:
+    """
+    Connection look-alike for TelemetryBrain (is_connected/query/read_pids/close).
+
+    sample_dt=None: simulated time follows the wall clock (live dashboard).
+    sample_dt=0.005: every request advances the drive by 5 ms (headless, 200 samples per drive-second).
+    The model always integrates in fixed STEP increments, so the trajectory only depends on the seed.
+    """
+    STEP = 0.01
+
+    def __init__(self, model=None, seed=0, sample_dt=None):
+        self.model = model or VehicleModel()
+        self.driver = DriverScript(seed)
+        self.rng = random.Random(seed + 1)
+        self.sample_dt = sample_dt
+        self.connected = True
+
+        self.t = 0.0            # Model time (s), moves in STEP increments
+        self.clock = 0.0        # Requested sample time (s)
+        self.speed = 0.0        # m/s
+        self.gear = 1
+        self.rpm = float(self.model.idle_rpm)
+        self.throttle = 0.0
+        self.trim = 0.0
+        self.coolant = 20.0     # Cold start, so the warmup advice triggers
+        self.intake = AMBIENT_TEMP
+        self._wall_start = time.monotonic()
+
+    # --- physics ---
+    def _gear_rpm(self, speed, gear):
+        ratio = self.model.gear_ratios[gear - 1] * self.model.final_drive
+        return speed / self.model.tire_radius * ratio * 60 / (2 * math.pi)
+
+    def _step(self, dt):
+        m = self.model
+        speed_kph = self.speed * 3.6
+        throttle, brake = self.driver.step(dt, speed_kph)
+        self.throttle = throttle
+
+        # Gear selection: shift later under more throttle, kick down for hard acceleration
+        shift_up = 2500 + 3500 * throttle
+        if self.rpm > shift_up and self.gear < len(m.gear_ratios):
+            self.gear += 1
+        elif self.gear > 1 and self._gear_rpm(self.speed, self.gear) < 1300:
+            self.gear -= 1
+        elif self.gear > 1 and throttle > 0.7 and self._gear_rpm(self.speed, self.gear - 1) < 0.8 * shift_up:
+            self.gear -= 1
+
+        # Engine speed: locked to the wheels, or slipping the clutch near standstill
+        wheel_rpm = self._gear_rpm(self.speed, self.gear)
+        slip_rpm = m.idle_rpm + throttle * 2500 if self.gear == 1 else m.idle_rpm
+        target_rpm = min(m.redline, max(wheel_rpm, slip_rpm))
+        self.rpm += (target_rpm - self.rpm) * min(1.0, dt * 10)
+
+        # Longitudinal forces
+        ratio = m.gear_ratios[self.gear - 1] * m.final_drive
+        drive = m.torque(self.rpm, throttle) * ratio * 0.9 / m.tire_radius
+        if self.speed < 0.5 and drive < 0:
+            drive = 0.0  # No engine braking once stopped
+        drag = 0.5 * AIR_DENSITY * m.drag_coeff * m.frontal_area * self.speed ** 2
+        rolling = 0.012 * m.mass * GRAVITY if self.speed > 0 else 0.0
+        braking = brake * 0.8 * m.mass * GRAVITY if self.speed > 0 else 0.0
+        self.speed = max(0.0, self.speed + (drive - drag - rolling - braking) / m.mass * dt)
+
+        # Slow signals: thermostat warmup, intake heat soak at low speed, trim noise
+        self.coolant += (90.0 - self.coolant) * dt / (240.0 - 120.0 * throttle)
+        soak = AMBIENT_TEMP + 15 * math.exp(-speed_kph / 30)
+        self.intake += (soak - self.intake) * dt / 20.0
+        self.trim += -self.trim * dt * 0.5 + self.rng.gauss(0, 1.5) * math.sqrt(dt)
+        self.t += dt
+
+    def advance_to(self, t):
+        while self.t + self.STEP <= t:
+            self._step(self.STEP)
+
+    # --- sensors ---
+    def pid_values(self):
+        """Current PID readings in the same units as python-obd."""
+        m = self.model
+        # Manifold fill follows throttle; VE as a fraction of the theoretical airflow
+        ve = 0.25 + 0.65 * self.throttle
+        density = 1.225 * 288.15 / (273.15 + self.intake)
+        maf = ve * self.rpm / 120 * (m.displacement / 1000) * density * 1000
+        return {
+            "RPM": self.rpm,
+            "SPEED": self.speed * 3.6,
+            "MAF": maf,
+            "ENGINE_LOAD": ve * 100,
+            "SHORT_FUEL_TRIM_1": max(-25.0, min(25.0, self.trim)),
+            "COOLANT_TEMP": self.coolant,
+            "INTAKE_TEMP": self.intake,
+        }
+
+    def __call__(self, t):
+        """ElmEmulator state hook: ElmEmulator(state=DriveSimulator(...))"""
+        self.advance_to(t)
+        return self.pid_values()
+
+    # --- connection surface ---
+    def is_connected(self):
+        return self.connected
+
+    def read_pids(self, names):
+        if self.sample_dt is None:
+            self.clock = time.monotonic() - self._wall_start
+        else:
+            self.clock += self.sample_dt
+        self.advance_to(self.clock)
+        values = self.pid_values()
+        return {n: values[n] for n in names if n in values}
+
+    def query(self, cmd, force=False):
+        if cmd.name not in PID_TABLE:
+            return RawResponse()
+        return RawResponse(RawValue(self.read_pids([cmd.name])[cmd.name]))
+
+    def close(self):
+        self.connected = False
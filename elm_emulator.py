@@ -0,0 +1,258 @@
+# elm_emulator.py
+# Virtual ELM327 on a pseudo-terminal (Linux/macOS). Speaks the AT command set and
+# Mode 01 over CAN 11bit/500k, so obd.OBD(port) and RawELM327(port) can be
+# load-tested end to end without a car.
+#
+#   python elm_emulator.py            -> prints the /dev/pts/N port and serves until Ctrl+C
+import os
+import pty
+import random
+import threading
+import time
+import tty
+
+from obd_pids import PID_TABLE, PID_ENCODERS, PID_NAMES
+
+ELM_VERSION = "ELM327 v1.5"
+ENGINE_HEADER = "7E8"
+# ATDPN answer: automatic, protocol 6 (ISO 15765-4 CAN 11bit 500k)
+PROTOCOL_NUMBER = "A6"
+
+
+class VehicleScript:
+    """
+    Scripted vehicle state: keyframes of (t_seconds, {pid_name: value}),
+    linearly interpolated and looped. PIDs missing from a keyframe keep the last value.
+    """
+    DEFAULT_KEYFRAMES = [
+        (0.0,  {"RPM": 800,  "SPEED": 0,   "MAF": 3.0,  "ENGINE_LOAD": 20, "SHORT_FUEL_TRIM_1": 0.0,
+                "COOLANT_TEMP": 85, "INTAKE_TEMP": 25}),
+        (5.0,  {"RPM": 800,  "SPEED": 0,   "MAF": 3.0,  "ENGINE_LOAD": 20, "SHORT_FUEL_TRIM_1": 1.5}),
+        (12.0, {"RPM": 6000, "SPEED": 100, "MAF": 120,  "ENGINE_LOAD": 95, "SHORT_FUEL_TRIM_1": -2.0}),
+        (14.0, {"RPM": 2500, "SPEED": 100, "MAF": 20,   "ENGINE_LOAD": 35, "SHORT_FUEL_TRIM_1": 0.5}),
+        (30.0, {"RPM": 2500, "SPEED": 100, "MAF": 20,   "ENGINE_LOAD": 30, "SHORT_FUEL_TRIM_1": -0.5,
+                "COOLANT_TEMP": 92, "INTAKE_TEMP": 30}),
+        (40.0, {"RPM": 800,  "SPEED": 0,   "MAF": 3.0,  "ENGINE_LOAD": 20, "SHORT_FUEL_TRIM_1": 0.0,
+                "COOLANT_TEMP": 85, "INTAKE_TEMP": 25}),
+    ]
+
+    def __init__(self, keyframes=None, loop=True):
+        self.keyframes = keyframes or self.DEFAULT_KEYFRAMES
+        self.loop = loop
+        # Fill in missing PIDs so every keyframe is complete
+        last = {}
+        self.frames = []
+        for t, values in self.keyframes:
+            last = {**last, **values}
+            self.frames.append((t, last))
+
+    def __call__(self, t):
+        duration = self.frames[-1][0]
+        if self.loop and duration > 0:
+            t %= duration
+        if t <= self.frames[0][0]:
+            return dict(self.frames[0][1])
+        for (t0, a), (t1, b) in zip(self.frames, self.frames[1:]):
+            if t <= t1:
+                f = (t - t0) / (t1 - t0) if t1 > t0 else 1.0
+                return {k: a[k] + (b.get(k, a[k]) - a[k]) * f for k in a}
+        return dict(self.frames[-1][1])
+
+
+class ElmEmulator:
+    """
+    state:      callable t -> {pid_name: value} (default VehicleScript()) or a fixed dict
+    latency:    seconds per command, or {prefix: seconds} e.g. {"AT": 0.002, "01": 0.035}
+    jitter:     extra uniform 0..jitter seconds per command
+    error_rate: share of Mode 01 requests answered with an error (NO DATA, CAN ERROR, ...)
+    batch:      False emulates an ECU that answers NO DATA to multi-PID requests
+    seed:       makes jitter and error injection repeatable
+    """
+    ERRORS = ("NO DATA", "CAN ERROR", "STOPPED")
+
+    def __init__(self, state=None, latency=0.03, jitter=0.0, error_rate=0.0, batch=True, seed=None):
+        self.state = state if state is not None else VehicleScript()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.batch = batch
+        self.rng = random.Random(seed)
+
+        self.master = None
+        self.slave = None
+        self.port = None
+        self.running = False
+        self._thread = None
+        self.requests = 0
+        self._reset_settings()
+
+    def _reset_settings(self):
+        self.echo = True
+        self.spaces = True
+        self.headers = False
+        self.linefeeds = False
+        self.last_command = ""
+
+    # --- lifecycle ---
+    def start(self):
+        """Opens the pty and starts answering. Returns the port name to connect to."""
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.running = True
+        self.t0 = time.monotonic()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        self.running = False
+        for fd in (self.master, self.slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.master = self.slave = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # --- serial loop ---
+    def _serve(self):
+        # Keep our own copy of the fd: stop() may clear self.master mid-answer
+        master = self.master
+        buffer = b""
+        while self.running:
+            try:
+                data = os.read(master, 1024)
+            except OSError:
+                break
+            if not data:
+                break
+            buffer += data
+            while b"\r" in buffer:
+                line, buffer = buffer.split(b"\r", 1)
+                self._answer(master, line.decode(errors="ignore"))
+
+    def _answer(self, master, raw):
+        cmd = raw.strip().upper().replace(" ", "")
+        if not cmd:
+            cmd = self.last_command  # Bare CR repeats the previous command
+        self.last_command = cmd
+        self.requests += 1
+
+        time.sleep(self._latency_for(cmd))
+        lines = self.handle(cmd)
+
+        eol = "\r\n" if self.linefeeds else "\r"
+        out = (raw + eol) if self.echo else ""
+        out += eol.join(lines) + eol + eol + ">"
+        try:
+            os.write(master, out.encode())
+        except OSError:
+            self.running = False
+
+    def _latency_for(self, cmd):
+        if isinstance(self.latency, dict):
+            base = next((s for p, s in self.latency.items() if cmd.startswith(p)), 0.0)
+        else:
+            base = self.latency
+        return base + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    # --- command handling ---
+    def handle(self, cmd):
+        """Returns the answer lines for one command (no echo, no prompt)."""
+        if cmd.startswith("AT"):
+            return self._handle_at(cmd[2:])
+        if cmd.startswith("01"):
+            return self._handle_mode01(cmd[2:])
+        return ["?"]
+
+    def _handle_at(self, at):
+        if at in ("Z", "WS"):
+            self._reset_settings()
+            return [ELM_VERSION]
+        if at == "I":
+            return [ELM_VERSION]
+        if at == "RV":
+            return ["12.6V"]
+        if at == "DPN":
+            return [PROTOCOL_NUMBER]
+        if at == "DP":
+            return ["AUTO, ISO 15765-4 (CAN 11/500)"]
+        toggles = {"E": "echo", "S": "spaces", "H": "headers", "L": "linefeeds"}
+        if len(at) == 2 and at[0] in toggles and at[1] in "01":
+            setattr(self, toggles[at[0]], at[1] == "1")
+        # Everything else (ATSP, ATTP, ATST, ATAT, ATM0, ...) is accepted as-is
+        return ["OK"]
+
+    def _handle_mode01(self, pids_hex):
+        # python-obd "fast" mode appends a frame-count digit: 010C1
+        if len(pids_hex) % 2:
+            pids_hex = pids_hex[:-1]
+        try:
+            pids = bytes.fromhex(pids_hex)
+        except ValueError:
+            return ["?"]
+        if not pids:
+            return ["?"]
+        if len(pids) > 1 and not self.batch:
+            return ["NO DATA"]
+        if self.error_rate and self.rng.random() < self.error_rate:
+            return [self.rng.choice(self.ERRORS)]
+
+        state = self.state(time.monotonic() - self.t0) if callable(self.state) else self.state
+        payload = [0x41]
+        for pid in pids:
+            if pid in (0x00, 0x20, 0x40):
+                payload += [pid] + self._supported_bitmap(pid)
+            elif pid in PID_NAMES and PID_NAMES[pid] in state:
+                name = PID_NAMES[pid]
+                payload += [pid] + [min(255, max(0, b)) for b in PID_ENCODERS[name](state[name])]
+        if len(payload) == 1:
+            return ["NO DATA"]
+        return self._format(payload)
+
+    def _supported_bitmap(self, base):
+        bits = 0
+        for pid in (p for p, _, _ in PID_TABLE.values()):
+            if base < pid <= base + 0x20:
+                bits |= 1 << (32 - (pid - base))
+        return list(bits.to_bytes(4, "big"))
+
+    def _format(self, payload):
+        """Frames the payload as an ELM327 prints CAN answers with the current settings."""
+        sep = " " if self.spaces else ""
+        hexs = lambda data: sep.join(f"{b:02X}" for b in data)
+
+        if len(payload) <= 7:
+            if self.headers:
+                return [ENGINE_HEADER + sep + hexs([len(payload)] + payload)]
+            return [hexs(payload)]
+
+        # ISO-TP multi-frame: first frame + consecutive frames
+        chunks = [payload[:6]] + [payload[i:i + 7] for i in range(6, len(payload), 7)]
+        if self.headers:
+            lines = [ENGINE_HEADER + sep + hexs([0x10 | (len(payload) >> 8), len(payload) & 0xFF] + chunks[0])]
+            for seq, chunk in enumerate(chunks[1:], 1):
+                lines.append(ENGINE_HEADER + sep + hexs([0x20 | (seq & 0x0F)] + chunk + [0x00] * (7 - len(chunk))))
+            return lines
+        # Headers off: byte count line, then numbered segments
+        lines = [f"{len(payload):03X}"]
+        for seq, chunk in enumerate(chunks):
+            lines.append(f"{seq & 0x0F:X}:{sep}" + hexs(chunk))
+        return lines
+
+
+if __name__ == "__main__":
+    emulator = ElmEmulator()
+    print(f"Virtual ELM327 listening on {emulator.start()} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        emulator.stop()
@@ -0,0 +1,145 @@
+# elm_transport.py
+# Lean ELM327 connection: talks AT/OBD over the serial port directly and decodes
+# PIDs straight to floats, skipping python-obd's OBDResponse and pint units.
+import time
+import serial
+
+from obd_pids import PID_TABLE, batch_command_bytes, decode_mode01
+
+ELM_PROMPT = b">"
+# Answers that mean "no value this time"
+ELM_ERRORS = ("NO DATA", "?", "CAN ERROR", "BUS INIT", "BUS ERROR", "STOPPED", "UNABLE TO CONNECT", "ERROR")
+
+
+class RawValue:
+    """Stands in for a pint Quantity: only .magnitude is ever read by the app."""
+    __slots__ = ("magnitude",)
+
+    def __init__(self, magnitude):
+        self.magnitude = magnitude
+
+
+class RawResponse:
+    """Minimal OBDResponse look-alike for code that still calls query()."""
+    __slots__ = ("value",)
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def is_null(self):
+        return self.value is None
+
+
+def parse_response(lines):
+    """
+    Turns ELM327 output lines (ATH0, ATS0) into Mode 01 payload bytes per message.
+    Handles single lines ('410C1AF8') and CAN multi-frame answers:
+        00F
+        0:410C1AF80D32
+        1:1001F4055A0480
+    """
+    messages = []
+    multi = None
+    length = None
+    for line in lines:
+        line = line.strip().replace(" ", "")
+        if not line or line.startswith("SEARCHING"):
+            continue
+        if any(line.startswith(e) for e in ELM_ERRORS):
+            continue
+        if len(line) == 3 and multi is None:
+            # Byte count header of a multi-frame answer
+            length = int(line, 16)
+            multi = bytearray()
+        elif len(line) > 2 and line[1] == ":" and multi is not None:
+            multi += bytes.fromhex(line[2:])
+        else:
+            try:
+                messages.append(bytes.fromhex(line))
+            except ValueError:
+                continue
+    if multi is not None:
+        messages.append(bytes(multi[:length]))
+    return messages
+
+
+class RawELM327:
+    """
+    Drop-in connection for TelemetryBrain. PidReader uses read_pids() directly;
+    query() is kept so anything written against python-obd still works.
+    """
+
+    def __init__(self, portstr, baudrate=38400, protocol="0", timeout=5.0):
+        self.portstr = portstr
+        self.port = None
+        self.connected = False
+        self.protocol_id = None
+        try:
+            self.port = serial.serial_for_url(portstr, baudrate=baudrate, timeout=timeout)
+            self._init_adapter(protocol)
+        except Exception as e:
+            print(f"Raw ELM327 connect failed on {portstr}: {e}")
+            self.close()
+
+    def _init_adapter(self, protocol):
+        if protocol == "0":
+            self.send("ATZ", delay=1.0)  # Full reset before a protocol search
+        else:
+            self.send("ATD")  # Known protocol (probe cache): defaults are enough, no 1 s reset
+        for cmd in ("ATE0", "ATL0", "ATS0", "ATH0", "ATSP" + protocol):
+            if not any("OK" in l for l in self.send(cmd)):
+                raise IOError(f"Adapter refused {cmd}")
+        # First real request triggers the protocol search
+        self.connected = bool(parse_response(self.send("0100")))
+        if not self.connected:
+            raise IOError("ECU did not answer 0100 (ignition off?)")
+        # Remember what the search found ("A6" = automatic, protocol 6)
+        dpn = self.send("ATDPN")
+        self.protocol_id = dpn[0].strip().lstrip("A") if dpn else protocol
+
+    def send(self, cmd, delay=None):
+        """Writes one command and returns the answer lines (without echo/prompt)."""
+        self.port.reset_input_buffer()
+        self.port.write(cmd.encode() + b"\r")
+        self.port.flush()
+        if delay:
+            time.sleep(delay)
+
+        buffer = bytearray()
+        while True:
+            chunk = self.port.read(self.port.in_waiting or 1)
+            if not chunk:
+                break  # Timeout
+            buffer += chunk
+            if ELM_PROMPT in chunk:
+                break
+
+        text = buffer.replace(ELM_PROMPT, b"").decode(errors="ignore")
+        return [l for l in text.replace("\r", "\n").split("\n") if l.strip() and l.strip() != cmd]
+
+    def read_pids(self, names):
+        """One Mode 01 request for up to 6 PIDs -> {name: float}. Missing PIDs are left out."""
+        values = {}
+        for payload in parse_response(self.send(batch_command_bytes(names).decode())):
+            values.update(decode_mode01(payload))
+        return values
+
+    # --- python-obd compatible surface ---
+    def is_connected(self):
+        return self.connected
+
+    def query(self, cmd, force=False):
+        name = cmd.name
+        if name not in PID_TABLE or not self.connected:
+            return RawResponse()
+        value = self.read_pids([name]).get(name)
+        return RawResponse(RawValue(value) if value is not None else None)
+
+    def close(self):
+        self.connected = False
+        if self.port:
+            try:
+                self.port.close()
+            except Exception:
+                pass
+            self.port = None
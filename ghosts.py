@@ -0,0 +1,114 @@
+# ghosts.py
+# Ghost runs: recorded drives compared against the live one at the same point of the
+# drive, either the same distance covered or the same time since moving off (idling
+# before the start is not counted on either side). No kivy imports; TelemetryReplayer
+# drives it from the UI tick.
+import os
+
+import numpy as np
+
+import binlog
+from session_catalog import SessionStats
+
+ALIGN_MODES = ("distance", "time")
+# Columns of GhostRun.table; deltas are reported for the first three
+COLUMNS = ("speed", "rpm", "hp", "elapsed", "distance")
+DELTAS = ("speed", "rpm", "hp")
+
+
+def cumulative_distance(t, speed):
+    """Metres covered at each sample (trapezoid over km/h; gaps longer than MAX_GAP add nothing)."""
+    dt = np.diff(t, prepend=t[:1])
+    dt[(dt < 0) | (dt > SessionStats.MAX_GAP)] = 0.0
+    prev = np.concatenate((speed[:1], speed[:-1]))
+    return np.cumsum((speed + prev) / 2 * dt / 3.6)
+
+
+class GhostRun:
+    """
+    One recorded drive prepared for lookups: elapsed time (from the first sample with
+    speed, 0 while idling before it) and cumulative distance are computed once, both never
+    decrease, so finding the ghost's state at any point is a binary search plus a linear
+    blend of the two neighbouring samples.
+    """
+
+    def __init__(self, records, name=""):
+        self.name = name
+        t = records["timestamp"].astype(float)
+        speed = records["speed"].astype(float)
+        moving = np.flatnonzero(speed > 0)
+        start = t[moving[0]] if len(moving) else t[0]
+        self.table = np.column_stack((speed, records["rpm"].astype(float), records["hp"].astype(float),
+                                      np.maximum(t - start, 0.0), cumulative_distance(t, speed)))
+        self.elapsed = self.table[:, 3]
+        self.distance = self.table[:, 4]
+
+    @classmethod
+    def load(cls, paths, name=None):
+        """A drive from its log segments (any format binlog reads)."""
+        if isinstance(paths, str):
+            paths = [paths]
+        records = binlog.read_logs(paths)
+        if not len(records):
+            raise ValueError(f"{paths[0]} holds no samples")
+        return cls(records, name or os.path.basename(paths[0]))
+
+    def at(self, position, align="distance"):
+        """(state row as in COLUMNS, finished) of the ghost at position metres or seconds."""
+        axis = self.distance if align == "distance" else self.elapsed
+        i = int(np.searchsorted(axis, position, side="right"))
+        if i >= len(axis):
+            return self.table[-1], True
+        if i == 0:
+            return self.table[0], False
+        lo, hi = axis[i - 1], axis[i]
+        w = (position - lo) / (hi - lo) if hi > lo else 0.0
+        return self.table[i - 1] + w * (self.table[i] - self.table[i - 1]), False
+
+
+class GhostOverlay:
+    """
+    Several ghosts against the live run. update() integrates the live distance from its
+    speed and returns, per ghost, live minus ghost for speed, RPM and HP plus the gap:
+    seconds behind (+) or ahead (-) when aligned by distance, metres ahead (+) by time.
+    """
+
+    def __init__(self, align="distance"):
+        if align not in ALIGN_MODES:
+            raise ValueError(f"Unknown ghost alignment: {align}")
+        self.align = align
+        self.ghosts = []
+        self.reset()
+
+    def add(self, paths, name=None):
+        ghost = GhostRun.load(paths, name)
+        self.ghosts.append(ghost)
+        return ghost
+
+    def reset(self):
+        """Restarts the live side (the ghosts start over with it)."""
+        self.start = None # Time of the first live sample with speed
+        self.last = None # (t, speed) of the previous live sample
+        self.distance = 0.0
+
+    def update(self, metrics, t):
+        """metrics: live 11-item list; t: its sample time in seconds. Returns one dict per ghost."""
+        speed = float(metrics[1])
+        if self.start is None and speed > 0:
+            self.start = t
+        if self.last is not None and 0 <= t - self.last[0] <= SessionStats.MAX_GAP:
+            self.distance += (speed + self.last[1]) / 2 * (t - self.last[0]) / 3.6
+        self.last = (t, speed)
+        elapsed = t - self.start if self.start is not None else 0.0
+        live = {"speed": speed, "rpm": float(metrics[0]), "hp": float(metrics[2])}
+
+        position = self.distance if self.align == "distance" else elapsed
+        deltas = []
+        for ghost in self.ghosts:
+            state, finished = ghost.at(position, self.align)
+            delta = {name: live[name] - float(state[i]) for i, name in enumerate(DELTAS)}
+            delta["gap"] = elapsed - float(state[3]) if self.align == "distance" else self.distance - float(state[4])
+            delta["name"] = ghost.name
+            delta["finished"] = finished
+            deltas.append(delta)
+        return deltas
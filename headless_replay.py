@@ -0,0 +1,144 @@
+# headless_replay.py
+# Pushes a recorded drive through TelemetryBrain, CarDoctor and DataLogger as fast as the
+# CPU allows (no kivy, no clock), then reports throughput, time per stage and the final
+# derived state. Re-running a real drive after a change to the math is a regression check.
+#
+#   python headless_replay.py                       -> newest drive in TelemetryLogs/
+#   python headless_replay.py run_log_1700000000_000.tlog [_001.tlog.gz ...] [--scalar]
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+
+import binlog
+from brain import CarDoctor, TelemetryBrain
+from logger import DataLogger, latest_session
+from session_catalog import SessionCatalog
+
+
+def raw_pids(records):
+    """
+    PID columns for TelemetryBrain rebuilt from logged metrics. MAF comes back from hp
+    (hp = maf * 1.32); fuel trim is not logged, so it is NaN (stability stays 0, no trim map).
+    """
+    def column(name):
+        return records[name].astype(float)
+    return {
+        "RPM": column("rpm"), "SPEED": column("speed"), "MAF": column("hp") / 1.32,
+        "COOLANT_TEMP": column("coolant"), "ENGINE_LOAD": column("load"),
+        "INTAKE_TEMP": column("temp_in"), "SHORT_FUEL_TRIM_1": np.full(len(records), np.nan),
+    }
+
+
+def replay(paths, batched=True, log_dir=None, chunk_rows=4096, displacement=2.0):
+    """
+    Runs the drive in paths (segments, in order) through the pipeline. Returns a dict with
+    samples, seconds, per-stage seconds and the final state. log_dir: where DataLogger
+    writes the re-derived log (None: a temporary folder, deleted afterwards).
+    """
+    brain = TelemetryBrain(displacement=displacement, log=False)
+    doctor = CarDoctor()
+    tmp_dir = None if log_dir else tempfile.mkdtemp(prefix="headless_replay_")
+    logger = DataLogger(base_dir=log_dir or tmp_dir)
+    stages = {"read": 0.0, "brain": 0.0, "doctor": 0.0, "logger": 0.0}
+    advice = Counter()
+    samples = 0
+    recorded_fuel = None
+
+    started = time.perf_counter()
+    chunks = binlog.iter_logs(paths, chunk_rows)
+    while True:
+        t0 = time.perf_counter()
+        records = next(chunks, None)
+        if records is None:
+            break
+        raw, t = raw_pids(records), records["timestamp"].astype(float)
+
+        t1 = time.perf_counter()
+        if batched:
+            metrics = brain.process_batch(raw, t)
+        else:
+            names = list(raw)
+            metrics = np.array([brain.process_sample({n: None if v != v else v for n, v in zip(names, row)}, ts)
+                                for ts, *row in zip(t.tolist(), *(raw[n].tolist() for n in names))])
+
+        t2 = time.perf_counter()
+        rows = metrics.tolist()
+        for row in rows:
+            advice[doctor.diagnose(row)[0]] += 1
+
+        t3 = time.perf_counter()
+        # Wait for the writer instead of dropping rows: its speed is part of the pipeline
+        while logger.queue.qsize() > logger.QUEUE_SIZE - len(rows):
+            time.sleep(0.001)
+        for i in np.flatnonzero(metrics[:, 0] > 0): # Same rule as live logging: engine running
+            logger.log_sample(rows[i], timestamp=t[i])
+        t4 = time.perf_counter()
+
+        stages["read"] += t1 - t0
+        stages["brain"] += t2 - t1
+        stages["doctor"] += t3 - t2
+        stages["logger"] += t4 - t3
+        samples += len(records)
+        recorded_fuel = float(records["fuel_total"][-1])
+
+    t0 = time.perf_counter()
+    logger.close(timeout=60)
+    stages["logger"] += time.perf_counter() - t0
+    for thread in logger.housekeepers: # Compression and catalog, before the folder may be deleted
+        thread.join()
+    seconds = time.perf_counter() - started
+    if tmp_dir:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    fuel_map = brain.fuel_map
+    return {
+        "samples": samples,
+        "seconds": seconds,
+        "stages": stages,
+        "cum_fuel": brain.cum_fuel,
+        "recorded_fuel": recorded_fuel,
+        "leaderboard": list(brain.leaderboard),
+        "fuel_map_mean": fuel_map.mean.copy(),
+        "fuel_map_count": fuel_map.count.copy(),
+        "advice": dict(advice),
+        "logged": logger.written,
+        "dropped": logger.dropped,
+    }
+
+
+def report(result):
+    n, seconds = result["samples"], result["seconds"]
+    print(f"{n} samples in {seconds:.2f} s: {n / max(seconds, 1e-9):,.0f} samples/s")
+    for stage, spent in result["stages"].items():
+        print(f"  {stage:7s} {spent:8.3f} s  {spent / max(seconds, 1e-9) * 100:5.1f} %")
+    print(f"fuel used   {result['cum_fuel']:.3f} L (recorded total {result['recorded_fuel']})")
+    print(f"0-100 runs  {', '.join(f'{x:.2f}s' for x in result['leaderboard']) or 'none'}")
+    count = result["fuel_map_count"]
+    hit = count > 0
+    print(f"fuel map    {np.count_nonzero(hit)}/{count.size} cells, {int(count.sum())} samples, "
+          f"mean {result['fuel_map_mean'][hit].mean() if hit.any() else 0:.2f} L/h over hit cells")
+    print(f"logger      {result['logged']} rows written, {result['dropped']} dropped")
+    for text, hits in sorted(result["advice"].items(), key=lambda item: -item[1]):
+        print(f"  {hits:7d} x {text}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a logged drive headless, as fast as possible.")
+    parser.add_argument("paths", nargs="*", help="Segments of one drive, in order (default: newest drive)")
+    parser.add_argument("--scalar", action="store_true", help="process_sample per row instead of process_batch")
+    parser.add_argument("--log-dir", help="Keep the re-derived log in this folder")
+    args = parser.parse_args()
+
+    paths = args.paths
+    if not paths and os.path.isdir("TelemetryLogs"):
+        catalog = SessionCatalog("TelemetryLogs")
+        latest = catalog.latest()
+        paths = catalog.files(latest["session"]) if latest else latest_session("TelemetryLogs")
+    if not paths:
+        parser.error("no log given and none found in TelemetryLogs/")
+    report(replay(paths, batched=not args.scalar, log_dir=args.log_dir))
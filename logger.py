@@ -1,33 +1,185 @@
 import csv
 import time
 import os
-from kivy.utils import platform
+import queue
+import re
+import threading
+
+import binlog
+from session_catalog import SessionCatalog, SessionStats, segment_name, stats_from_files
+
+try:
+    from kivy.utils import platform
+except ImportError:
+    platform = None # Headless (benchmarks, replay tools): desktop paths
+
+# "binary": compact .tlog (see binlog.py), "csv": plain text, readable in a spreadsheet
+LOG_FORMAT = "binary"
+
+# run_log_<session start>[_<segment>].tlog|csv[.gz|.xz]
+LOG_NAME = re.compile(r"run_log_(\d+)(?:_(\d+))?\.(tlog|csv)(\.gz|\.xz)?$")
+
+
+def _scan(base_dir):
+    """
+    [(session, segment, path, compressed)] oldest first, from the file names alone (no stat).
+    One file per segment: if a segment exists twice (CSV converted to .tlog, compression
+    killed before removing the original) the .tlog wins over the CSV, then plain over compressed.
+    """
+    try:
+        names = os.listdir(base_dir)
+    except OSError:
+        return []
+    found = {}
+    for name in names:
+        m = LOG_NAME.match(name)
+        if not m:
+            continue
+        key = (int(m.group(1)), int(m.group(2) or 0))
+        rank = (m.group(3) == "csv", bool(m.group(4)))
+        if key not in found or rank < found[key][0]:
+            found[key] = (rank, os.path.join(base_dir, name))
+    return [(session, segment, path, rank[1]) for (session, segment), (rank, path) in sorted(found.items())]
+
+
+def list_logs(base_dir):
+    """Every log segment in base_dir, oldest first."""
+    return [path for _, _, path, _ in _scan(base_dir)]
+
+
+def latest_session(base_dir):
+    """The segments of the newest drive, in order (empty list if there is none)."""
+    logs = _scan(base_dir)
+    if not logs:
+        return []
+    return [path for session, _, path, _ in logs if session == logs[-1][0]]
+
+
+def _footprint(path):
+    """Bytes of a segment on disk including its sidecars (.npy cache, .idx restart points)."""
+    size = os.path.getsize(path)
+    for suffix in binlog.SIDECARS:
+        try:
+            size += os.path.getsize(path + suffix)
+        except OSError:
+            pass
+    return size
+
+
+def enforce_quota(base_dir, quota, keep=None):
+    """
+    Deletes the oldest segments (with their sidecars) until the logs fit in quota bytes,
+    sparing those for which keep(path) is true (checked at deletion time). Returns the
+    deleted paths.
+    """
+    logs = list_logs(base_dir)
+    sizes = {}
+    for path in logs:
+        try:
+            sizes[path] = _footprint(path)
+        except OSError:
+            pass
+    total = sum(sizes.values())
+    removed = []
+    for path in logs:
+        if total <= quota:
+            break
+        if path not in sizes or (keep and keep(path)):
+            continue
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Log cleanup failed: {e}")
+            continue
+        binlog.remove_cache(path)
+        total -= sizes[path]
+        removed.append(path)
+    return removed
 
 class DataLogger:
-    def __init__(self):
-        # Determine path based on device
-        if platform == 'android':
+    """
+    Log writer fed through a bounded queue: log_sample() only enqueues (never blocks the
+    OBD worker), a writer thread keeps the file open and writes rows in batches, flushing
+    every FLUSH_ROWS rows or FLUSH_SECONDS. If storage falls behind and the queue fills up,
+    new rows are dropped and counted in `dropped` instead of stalling acquisition.
+
+    A drive is written as segments (run_log_<start>_000, _001, ...), each created with the
+    first rows written to it (a logger that never logs leaves no file). The writer starts a
+    new one after SEGMENT_BYTES or SEGMENT_SECONDS; closed segments are compressed in the
+    background and the oldest ones deleted once the folder exceeds QUOTA_BYTES.
+    """
+    QUEUE_SIZE = 5000     # ~4 min at 20 Hz
+    FLUSH_ROWS = 200
+    FLUSH_SECONDS = 2.0
+    SEGMENT_BYTES = 8 * 1024 * 1024
+    SEGMENT_SECONDS = 30 * 60
+    COMPRESSION = "gzip"  # "gzip", "lzma" (smaller, slower) or None
+    QUOTA_BYTES = 512 * 1024 * 1024
+    # Segments of other sessions untouched for this long are finished (crashed or old runs)
+    IDLE_SECONDS = 60
+
+    def __init__(self, fmt=None, base_dir=None):
+        self.binary = (fmt or LOG_FORMAT) == "binary"
+        # Determine path based on device (base_dir: explicit folder, e.g. headless replays)
+        if base_dir is None and platform == 'android':
             from android.storage import primary_external_storage_path
             base_dir = os.path.join(primary_external_storage_path(), 'TelemetryLogs')
-        else:
+        elif base_dir is None:
             # On PC, save in the current folder
             base_dir = os.path.join(os.getcwd(), 'TelemetryLogs')
 
         if not os.path.exists(base_dir):
             os.makedirs(base_dir)
 
-        self.filepath = os.path.join(base_dir, f"run_log_{int(time.time())}.csv")
+        self.base_dir = base_dir
+        self.extension = binlog.EXTENSION if self.binary else ".csv"
+        self.session = int(time.time())
+        self.segment = 0
         self.headers = ["timestamp", "rpm", "speed", "hp", "torque", "ve", "fuel_rate", "coolant", "load", "fuel_total", "stability", "temp_in"]
-        
-        # Create file and write headers immediately
-        with open(self.filepath, "w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow(self.headers)
+        self.filepath = self._segment_path() # Created on the first write
+
+        self.queue = queue.Queue(maxsize=self.QUEUE_SIZE)
+        self.dropped = 0  # Rows lost because the queue was full
+        self.written = 0
+        self.closed = False
+        # Session index (start/end, samples, distance, top speed, fuel), updated per segment
+        self.catalog = SessionCatalog(base_dir)
+        self.stats = SessionStats()
+        self._backfilled = False
+        self._stats_stale = False # Quota removed segments of this drive: recount self.stats
+        self._housekeeping_lock = threading.Lock()
+        self.housekeepers = [] # Every housekeeping thread started (close() joins them)
+        self._thread = threading.Thread(target=self._writer, daemon=True)
+        self._thread.start()
+        # Leftovers of earlier drives (e.g. killed before compressing) and the quota
+        self._start_housekeeping()
+
+    def _segment_path(self):
+        return os.path.join(self.base_dir, f"run_log_{self.session}_{self.segment:03d}{self.extension}")
+
+    def _open_segment(self):
+        """Creates the current segment (header first): long-lived handle + the matching batch writer."""
+        self._segment_started = time.monotonic()
+        if self.binary:
+            f = open(self.filepath, "wb")
+            binlog.write_header(f)
+            return f, lambda rows: f.write(binlog.encode_rows(rows))
+        f = open(self.filepath, "w", newline="")
+        writer = csv.writer(f)
+        writer.writerow(self.headers)
+        return f, writer.writerows
+
+    def session_files(self):
+        """This drive's segments so far, in order (closed ones may already be compressed)."""
+        prefix = f"run_log_{self.session}_"
+        return [path for path in list_logs(self.base_dir) if os.path.basename(path).startswith(prefix)]
 
-    def log_sample(self, metrics):
+    def log_sample(self, metrics, timestamp=None):
         # metrics list order must match headers logic in main.py 11-item list
         # [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, fuel_total, stability, temp_in]
-        timestamp = time.time()
+        # timestamp: wall-clock time the PIDs were read (TelemetryBrain passes it in)
+        if timestamp is None:
+            timestamp = time.time()
         
         # row will now be 1(timestamp) + 11(metrics)
         # Let's map explicitly to be safe:
@@ -42,10 +194,147 @@ class DataLogger:
                 while len(row) < len(self.headers):
                     row.append(25.0)
                 
-        
         try:
-            with open(self.filepath, "a", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer(self):
+        f = write_rows = None
+        batch = []
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            timeout = max(0.0, self.FLUSH_SECONDS - (time.monotonic() - last_flush))
+            try:
+                row = self.queue.get(timeout=timeout)
+                if row is None:
+                    running = False # close(): write what is left, then stop
+                else:
+                    batch.append(row)
+                    # Drain whatever else is already waiting without blocking
+                    while len(batch) < self.FLUSH_ROWS:
+                        row = self.queue.get_nowait()
+                        if row is None:
+                            running = False
+                            break
+                        batch.append(row)
+            except queue.Empty:
+                pass
+
+            if batch and (len(batch) >= self.FLUSH_ROWS or not running
+                          or time.monotonic() - last_flush >= self.FLUSH_SECONDS):
+                try:
+                    if f is None:
+                        f, write_rows = self._open_segment()
+                    write_rows(batch)
+                    f.flush()
+                    self.written += len(batch)
+                    self.stats.add_rows(batch)
+                except Exception as e:
+                    print(f"Logging Error: {e}")
+                batch = []
+                last_flush = time.monotonic()
+
+                if running and f is not None and (f.tell() >= self.SEGMENT_BYTES or
+                                                  time.monotonic() - self._segment_started >= self.SEGMENT_SECONDS):
+                    f.close()
+                    f = None
+                    self._update_catalog(closed=False)
+                    self.segment += 1
+                    self.filepath = self._segment_path()
+                    self._start_housekeeping()
+            elif not batch:
+                last_flush = time.monotonic()
+        if f is not None:
+            f.close()
+        self.closed = True
+        self._update_catalog(closed=True)
+        self._start_housekeeping()
+
+    def _update_catalog(self, closed):
+        # Writer thread, no segment open: every row is on disk
+        files = self.session_files()
+        if not files:
+            return # Nothing logged
+        if self._stats_stale:
+            self._stats_stale = False
+            self.stats = stats_from_files(files)
+        try:
+            self.catalog.record(self.session, self.stats, [segment_name(p) for p in files], closed)
         except Exception as e:
-            print(f"Logging Error: {e}")
\ No newline at end of file
+            print(f"Catalog Error: {e}")
+
+    def _start_housekeeping(self):
+        # Runs take turns on the lock in no set order: waiting for all means joining all
+        thread = threading.Thread(target=self._housekeeping, daemon=True)
+        self.housekeepers.append(thread)
+        thread.start()
+
+    def _housekeeping(self):
+        """Compresses finished segments, then trims the folder to the quota (background thread)."""
+        with self._housekeeping_lock:
+            now = time.time()
+            for session, segment, path, compressed in _scan(self.base_dir):
+                if compressed or self._is_open(session, segment) or not self.COMPRESSION:
+                    continue
+                try:
+                    if session != self.session and now - os.path.getmtime(path) < self.IDLE_SECONDS:
+                        continue # Another logger may still be writing it
+                    binlog.compress_file(path, self.COMPRESSION)
+                except OSError as e:
+                    print(f"Log compression failed: {e}")
+            # Half-written archives from a compression that was killed (the original is still there)
+            for name in os.listdir(self.base_dir):
+                path = os.path.join(self.base_dir, name)
+                if name.startswith("run_log_") and name.endswith(".tmp"):
+                    try:
+                        if now - os.path.getmtime(path) >= self.IDLE_SECONDS:
+                            os.remove(path)
+                    except OSError:
+                        pass
+            removed = enforce_quota(self.base_dir, self.QUOTA_BYTES, keep=self._is_open_path)
+            if any(os.path.basename(p).startswith(f"run_log_{self.session}_") for p in removed):
+                self._stats_stale = True
+            try:
+                if removed:
+                    self.catalog.forget_files(removed)
+                if not self._backfilled:
+                    self._backfill()
+            except Exception as e:
+                print(f"Catalog Error: {e}")
+
+    def _is_open(self, session, segment):
+        """
+        Whether the writer may still append to this segment. Checked against the live
+        self.segment, not a path read earlier: the writer can rotate during housekeeping,
+        and a file can only be listed once self.segment already counts it.
+        """
+        return session == self.session and not self.closed and segment >= self.segment
+
+    def _is_open_path(self, path):
+        m = LOG_NAME.match(os.path.basename(path))
+        return bool(m) and self._is_open(int(m.group(1)), int(m.group(2) or 0))
+
+    def _backfill(self):
+        """Catalogs drives that are on disk but not (fully) in the catalog: older logs, killed runs."""
+        self._backfilled = True
+        known = self.catalog.known() - self.catalog.pending()
+        sessions = {}
+        for session, _, path, _ in _scan(self.base_dir):
+            if session != self.session and session not in known:
+                sessions.setdefault(session, []).append(path)
+        for session, paths in sessions.items():
+            self.catalog.record(session, stats_from_files(paths), [segment_name(p) for p in paths], closed=True)
+
+    def close(self, timeout=2.0):
+        """
+        Writes the rows still queued, closes the file and waits for housekeeping (compression,
+        quota, catalog), all within timeout seconds; what is left goes on in the background.
+        """
+        deadline = time.monotonic() + timeout
+        if self._thread.is_alive():
+            self.queue.put(None)
+            self._thread.join(timeout)
+        for thread in list(self.housekeepers):
+            thread.join(max(0.0, deadline - time.monotonic()))
@@ -1,16 +1,21 @@
 import time
 import threading
-import random
 import obd
 import numpy as np
-from unittest.mock import MagicMock
 
 from visuals import RealTimeGraph, ShiftBar, StressMeter
-from logger import DataLogger
 from engine_data import calculate_extra_metrics
+from brain import CarDoctor, TelemetryBrain
 from calibration import CalibrationPopup
 from car_db import CarDatabase
 from replay import TelemetryReplayer
+from logger import latest_session
+from session_catalog import SessionCatalog
+from elm_transport import RawELM327
+from drive_sim import DriveSimulator, VehicleModel
+import probe_cache
+from port_scan import PortScanner
+from snapshot import LatestSnapshot
 
 from kivy.storage.jsonstore import JsonStore
 from kivy.uix.listview import ListView # Or a RecycleView for modern Kivy
@@ -26,9 +31,17 @@ from kivy.uix.image import Image
 from kivy.uix.widget import Widget
 from kivy.uix.button import Button
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.popup import Popup
 from kivy.utils import platform
 
 # --- TOGGLE SWITCH ---
+# True = lean RawELM327 transport (plain floats, no python-obd/pint per value)
+USE_RAW_TRANSPORT = False
+# Simulator drive seed: same seed -> same drive, sample for sample
+SIM_SEED = 0
+# Dashboard refresh rate (Hz): the UI shows the newest sample at this rate, older ones are dropped
+DISPLAY_RATE = 30
+
 # --- Logic to Auto-Switch between Real Car and Mock ---
 def get_connection():
     # Look for Bluetooth/USB ports
@@ -38,160 +51,34 @@ def get_connection():
         print(f"Error getting ports: {e}")
         print("Failed to load BT/WiFi/MockMode connection")              
 
-# -------------------------------------------------------------------------
-# LOGIC CORE: Calculates physics and stores history
-# -------------------------------------------------------------------------
-class CarDoctor:
-    @staticmethod
-    def diagnose(metrics):
-        """
-        Analyzes metrics and returns a 'Prescription' (Recommendation string)
-        metrics: [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, cum_fuel, stability. temp_in]
-        """
-        rpm, speed, hp, torque, ve, fuel, coolant, load, total_fuel, stability, temp_in = metrics
-        
-        advice = "System Normal"
-        severity = 0 # 0=Green, 1=Yellow, 2=Red
-
-        # 1. Warmup Protection
-        if coolant < 70:
-            advice = "⚠️ Engine Cold: Limit RPM < 3000"
-            severity = 1
-            if rpm > 3500:
-                advice = "⛔ CRITICAL: HIGH RPM ON COLD ENGINE!"
-                severity = 2
-
-        # 2. Overheat Warning
-        elif coolant > 105:
-            advice = "⛔ OVERHEATING: Check Airflow / Coolant"
-            severity = 2
-        
-        # 3. Efficiency Trainer (Highway Cruising)
-        elif speed > 80 and load < 30 and rpm > 3000:
-            advice = "💡 Shift Up to Save Fuel"
-            severity = 0
-            
-        # 4. Stability Check (Rough Idle or Misfire)
-        elif speed < 5 and stability > 3.0:
-            advice = "⚠️ Rough Idle Detected: Check Spark/Fuel"
-            severity = 1
-
-        return advice, severity
-
-class TelemetryBrain:
-    def __init__(self, displacement=2.0):
-        self.displacement = displacement
-        self.cum_fuel = 0
-        self.perf_running = False
-        self.perf_start_time = None
-        self.leaderboard = []
-        
-        # Logger
-        self.logger = DataLogger() 
-        self.logging_active = True
-
-        # Buffers for smoothing
-        self.connection = None
-        self.trim_window = []
-        
-        # Bins for the Fuel Map
-        self.rpm_bins = np.arange(0, 7501, 250)
-        self.load_bins = np.arange(0, 101, 5)
-        self.fuel_map = np.zeros((len(self.load_bins), len(self.rpm_bins)))
-
-    def process_data(self, connection):
-        """
-        This method is designed to be run in a BACKGROUND THREAD.
-        It queries the OBD port (blocking operation) and returns calculated metrics.
-        """
-        if not connection or not connection.is_connected():
-            return [0]*10
-
-        # Query OBD (These take time!)
-        r = connection.query(obd.commands.RPM)
-        s = connection.query(obd.commands.SPEED)
-        m = connection.query(obd.commands.MAF)
-        c = connection.query(obd.commands.COOLANT_TEMP)
-        l = connection.query(obd.commands.ENGINE_LOAD)
-        t = connection.query(obd.commands.SHORT_FUEL_TRIM_1)
-        i = connection.query(obd.commands.INTAKE_TEMP)
-
-        # Extract values safely
-        rpm = r.value.magnitude if not r.is_null() else 0
-        speed = s.value.magnitude if not s.is_null() else 0
-        maf = m.value.magnitude if not m.is_null() else 0
-        coolant = c.value.magnitude if not c.is_null() else 0
-        load = l.value.magnitude if not l.is_null() else 0
-        trim = t.value.magnitude if not t.is_null() else 0
-        intake = i.value.magnitude if not i.is_null() else 0
-        temp_in = self.connection.query(obd.commands.INTAKE_TEMP).value.magnitude if not i.is_null() else 25
-
-        # --- Calculations ---
-        hp = maf * 1.32
-        # Torque (Nm) = (HP * 5252 / RPM) * 1.3558 (conversion to Nm)
-        # Simplified: (HP * 7120) / RPM
-        torque = (hp * 7127) / rpm if rpm > 500 else 0
-        
-        # Air Density for VE calc
-        density = 1.225 * 288.15 / (273.15 + intake)
-        
-        # Volumetric Efficiency
-        ve = 0
-        if rpm > 400:
-            theoretical_flow = (rpm * (self.displacement/1000) * density) / 120 * 1000
-            ve = (maf / theoretical_flow) * 100
-
-        # Fuel Rate (Liters per hour)
-        fuel_rate = (maf * 3600) / (14.7 * 740)
-        self.cum_fuel += fuel_rate * 0.1 / 3600  # Integrate over 0.1s (approx)
-
-        # Stability (Fuel Trim Standard Deviation)
-        self.trim_window.append(trim)
-        if len(self.trim_window) > 40: 
-            self.trim_window.pop(0)
-        stability = np.std(self.trim_window) if len(self.trim_window) > 5 else 0
-
-        # 0-100 Performance Timer
-        if not self.perf_running and 2 < speed < 8:
-            self.perf_running = True
-            self.perf_start_time = time.time()
-        elif self.perf_running and speed >= 100:
-            elapsed = time.time() - self.perf_start_time
-            self.leaderboard.append(elapsed)
-            self.leaderboard = sorted(self.leaderboard)[:3] # Keep top 3
-            self.perf_running = False
-
-        # Update Fuel Map Learning
-        r_idx = np.digitize(rpm, self.rpm_bins) - 1
-        l_idx = np.digitize(load, self.load_bins) - 1
-        
-        if 0 <= r_idx < len(self.rpm_bins) and 0 <= l_idx < len(self.load_bins):
-            # Simple averaging or overwrite? Let's use overwrite for now
-            self.fuel_map[l_idx, r_idx] = fuel_rate
-
-        current_metrics = [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, self.cum_fuel, stability, temp_in]
-
-        # --- LOGGING INTEGRATION ---
-        if self.logging_active and rpm > 0: # Only log if engine is running
-            self.logger.log_sample(current_metrics)
-
-        return current_metrics
-
 # -------------------------------------------------------------------------
 # UI WIDGET: Draws the Fuel Map
 # -------------------------------------------------------------------------
 class FuelMapWidget(Widget):
+    # Tap the map to cycle: learned fuel rate, confidence (samples per cell), coverage (visited cells)
+    MODES = ("mean", "confidence", "hits")
+
     def __init__(self, brain, **kwargs):
         super().__init__(**kwargs)
         self.brain = brain
+        self.mode = "mean"
         self.img = Image(size_hint=(1, 1))
         self.add_widget(self.img)
         Clock.schedule_interval(self.update_texture, 0.5)
 
+    def on_touch_down(self, touch):
+        if self.collide_point(*touch.pos):
+            self.mode = self.MODES[(self.MODES.index(self.mode) + 1) % len(self.MODES)]
+            self.update_texture(0)
+            return True
+        return super().on_touch_down(touch)
+
     def update_texture(self, dt):
-        data = self.brain.fuel_map
-        # Normalize data 0-255 for visualization
-        if np.max(data) > 0:
+        data = self.brain.fuel_map.layer(self.mode)
+        # Normalize data 0-255 for visualization (confidence/coverage are already 0..1)
+        if self.mode != "mean":
+            norm = (data * 255).astype(np.uint8)
+        elif np.max(data) > 0:
             norm = (data - np.min(data)) / (np.ptp(data) + 1e-6)
             norm = (norm * 255).astype(np.uint8)
         else:
@@ -217,7 +104,6 @@ class ModernMetricCard(ButtonBehavior, BoxLayout):
         self.title = title
         self.icon = icon
         self.value_label = Label(text="__", font_size='36sp', bold=True, color=(1, 1, 1, 1))
-        self.ghost_metrics = TelemetryReplayer(start_ghost_mode)
         self.ghost_val = Label(
             text="", 
             font_size='18sp', 
@@ -233,14 +119,6 @@ class ModernMetricCard(ButtonBehavior, BoxLayout):
         
         self.bind(pos=self.update_canvas, size=self.update_canvas)
 
-    def handle_ghost_data(self, ghost_m):
-        # This stores the ghost data so the main update_ui can see it
-        self.ghost_metrics = ghost_m
-
-    def start_ghost_race(self, log_file_path):
-        # This is how you actually 'use' start_ghost_mode
-        self.replayer.start_ghost_mode(log_file_path, self.handle_ghost_data)
-
     def update_ghost(self, value):
         self.ghost_val.text = f"GHOST: {value}"
 
@@ -263,75 +141,58 @@ class BTDeviceWindow(Popup):
         self.title = "SELECT OBD-II DEVICE"
         self.size_hint = (0.8, 0.8)
         self.callback = reconnect_callback
-        app = App.get_running_app()
         
-        layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        self.store = JsonStore('car_settings.json')
+        last_port = self.store.get('last_adapter')['port'] if self.store.exists('last_adapter') else None
         
-        # Scan for ports (ELM327 adapters)
-        ports = obd.scan_serial()
-        
-        if not ports:
-            layout.add_widget(Label(text="No Bluetooth Devices Found"))
-            # Attempt 3: If no ports or connection fails, go Mock
-            print("⚠️ NO OBD ADAPTER FOUND - ENGAGING SIMULATOR")
-            print("⚠️ --- STARTING MOCK MODE")
-            print("⚠️ SIMULATOR MODE ACTIVE")
-            app.system_state["has_adapter"] = False
-            app.system_state["mode"] = "MOCK"
-            app.is_mock = True
-            def fake_query(command):
-                res = MagicMock()
-                if command.name == "RPM": val = random.randint(800, 6500)
-                elif command.name == "SPEED": val = random.randint(0, 140)
-                elif command.name == "MAF": val = random.uniform(5.0, 150.0)
-                elif command.name == "COOLANT_TEMP": val = random.randint(80, 105)
-                elif command.name == "ENGINE_LOAD": val = random.uniform(10, 95)
-                elif command.name == "SHORT_FUEL_TRIM_1": val = random.uniform(-5, 5)
-                else: val = 25
-                res.value.magnitude = val
-                res.is_null.return_value = False
-                return res
-            MagicMock.is_connected.return_value = True
-            MagicMock.query.side_effect = fake_query
-            return MagicMock()
-        else:
-            for port in ports:
-                btn = Button(on_press=self.bt_connect, text=f"Device: {port}", size_hint_y=None, height=50)
-                # When pressed, it tells the app to reconnect to THIS port
-                btn.bind(on_release=lambda x, p=port: self.select_and_close(p))
-                layout.add_widget(btn)
+        layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        self.ports_box = BoxLayout(orientation='vertical', spacing=10)
+        self.scan_label = Label(text="🔍 Scanning for OBD adapters...", size_hint_y=None, height=40)
+        layout.add_widget(self.scan_label)
+        layout.add_widget(self.ports_box)
         
         close_btn = Button(text="CANCEL", size_hint_y=None, height=50)
         close_btn.bind(on_release=self.dismiss)
         layout.add_widget(close_btn)
         self.content = layout
 
+        # Scan for ports (ELM327 adapters) off the UI thread; buttons appear as ports are found.
+        # The last adapter that connected is probed first.
+        self.scanner = PortScanner(
+            on_found=lambda port: Clock.schedule_once(lambda dt: self.add_port(port)),
+            on_done=lambda ports: Clock.schedule_once(lambda dt: self.scan_finished(ports)),
+            preferred=last_port,
+        ).start()
+        self.bind(on_dismiss=lambda *args: self.scanner.cancel())
+
+    def add_port(self, port):
+        btn = Button(text=f"Device: {port}", size_hint_y=None, height=50)
+        # When pressed, it tells the app to reconnect to THIS port
+        btn.bind(on_release=lambda x, p=port: self.select_and_close(p))
+        self.ports_box.add_widget(btn)
+
+    def scan_finished(self, ports):
+        if ports:
+            self.scan_label.text = f"Found {len(ports)} device(s)"
+            return
+        
+        app = App.get_running_app()
+        self.scan_label.text = "No Bluetooth Devices Found"
+        # Attempt 3: If no ports or connection fails, go Mock
+        print("⚠️ NO OBD ADAPTER FOUND - ENGAGING SIMULATOR")
+        print("⚠️ --- STARTING MOCK MODE")
+        print("⚠️ SIMULATOR MODE ACTIVE")
+        app.system_state["has_adapter"] = False
+        app.system_state["mode"] = "MOCK"
+        app.is_mock = True
+        # Physics-based drive (mass/drag from the selected car, if the DB is loaded)
+        specs = app.db.get_specs(app.db.get_last_car()[0]) if getattr(app, "db", None) else None
+        app.connection = DriveSimulator(VehicleModel.from_specs(specs), seed=SIM_SEED)
+
     def select_and_close(self, port):
         self.callback(port) # Triggers manual_reconnect(port)
         self.dismiss()
 
-    def bt_connect(self, port, **kwargs):
-        app = App.get_running_app()
-        try:
-            # Attempt 1: Real Car
-            conn = obd.OBD(port[0])
-            if conn.is_connected():
-                app.system_state["has_adapter"] = True
-                app.system_state["mode"] = "LIVE"
-                app.is_mock = False
-                print(f"Connecting to Serial: {port[0]}")
-                print(f"✅ REAL CAR DETECTED ANDCONNECTED ON {port[0]}")
-                return conn
-        except:
-            # Attempt 2. Try WiFi (Common Address)
-            # connection_string="192.168.0.10:35000" is standard for many WiFi dongles
-            wifi_conn = obd.OBD(connection_string="192.168.0.10:35000")
-            if wifi_conn.is_connected():
-                app.system_state["has_adapter"] = True
-                app.system_state["mode"] = "LIVE"
-                print("Connected via WiFi")
-                return wifi_conn
-
 class PrunerDashApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -340,6 +201,14 @@ class PrunerDashApp(App):
             "has_adapter": False, # Physical connection status
             "active_cc": 2.0      # Current engine displacement
         }
+        self.ghost_metrics = None # Shadow-needle ghost sample for update_ui (None: off; ghost races use ghost_lbl)
+        self.connect_started = None # Monotonic time of the last connect attempt (time-to-first-sample)
+        self.adapter_port = None # Adapter picked in the BT window, connected by the worker thread
+        # Worker -> UI hand-off: one slot, always the newest sample
+        self.snapshot = LatestSnapshot()
+        self.system_state["frames_coalesced"] = 0 # Samples the UI skipped because a newer one arrived
+        self.system_state["display_lag_ms"] = 0.0 # Worker publish -> UI display delay
+        self.system_state["log_dropped"] = 0 # Log rows lost because storage could not keep up
 
     def start_telemetry(self):
         # 1. Check what car the user selected last
@@ -349,7 +218,7 @@ class PrunerDashApp(App):
         # 3. Pass the REAL displacement to the brain (convert cc to Liters)
         real_displacement = specs['cc'] / 1000.0 if specs else 2.0
         
-        self.brain = TelemetryBrain(displacement=real_displacement)
+        self.brain = TelemetryBrain(displacement=real_displacement, vehicle=active_car_name)
 
     def build(self):
         # 1. Handle Android Permissions (Updated for Android 12+)
@@ -383,7 +252,8 @@ class PrunerDashApp(App):
         if store.exists('engine'):
             saved_cc = store.get('engine')
             specs = saved_cc['cc'] / 1000.0
-            self.brain = TelemetryBrain(displacement=specs)
+            vehicle = store.get('active_car')['model'] if store.exists('active_car') else "Default"
+            self.brain = TelemetryBrain(displacement=specs, vehicle=vehicle)
             print(f"Loaded Saved Config: {saved_cc}cc")
         else:
             try:
@@ -501,6 +371,11 @@ class PrunerDashApp(App):
         replay_btn = Button(text="📹 REPLAY LAST RUN", size_hint_y=None, height=60, background_color=(0, 0.5, 1, 1))
         replay_btn.bind(on_press=self.trigger_replay)
         self.main_container.add_widget(replay_btn)
+
+        # Race the last runs: live-minus-ghost deltas, matched by distance driven
+        ghost_btn = Button(text="👻 RACE LAST 3 RUNS", size_hint_y=None, height=60, background_color=(0.5, 0.5, 0.5, 1))
+        ghost_btn.bind(on_press=lambda x: self.trigger_ghost_race())
+        self.main_container.add_widget(ghost_btn)
         
         # -- Define Metrics with Icons --
         # Main Data Grid
@@ -552,11 +427,14 @@ class PrunerDashApp(App):
         
         self.leader_lbl = Label(text="0-100: N/A", font_size='16sp', color=(0,1,1,1), size_hint_y=None, height=50)
         self.layout.add_widget(self.leader_lbl)
+        self.ghost_lbl = Label(text="", font_size='14sp', color=(1, 1, 1, 0.6), size_hint_y=None, height=50)
+        self.layout.add_widget(self.ghost_lbl)
         self.layout.add_widget(FuelMapWidget(self.brain))
         self.main_container.add_widget(self.rpm_graph)
         self.main_container.add_widget(self.dashboard_grid)
 
         # 5. UI Update Loop (Fast, non-blocking)
+        Clock.schedule_interval(self.show_latest_snapshot, 1.0 / DISPLAY_RATE)
         self.start_connection_thread()
         
         from kivy.core.window import Window
@@ -591,12 +469,27 @@ class PrunerDashApp(App):
             self.replayer = TelemetryReplayer(log_path, self.update_ui_from_data)
             self.replayer.start_replay(speed=2.0) # Play back at 2x speed!
         except:
-            import os
-            log_dir = "TelemetryLogs"
-            files = [os.path.join(log_dir, f) for f in os.listdir(log_dir)]
-            if files:
-                latest_file = max(files, key=os.path.getctime)
-                self.replayer.start_replay(latest_file)
+            # Newest drive from the session catalog (no directory scan)
+            catalog = SessionCatalog("TelemetryLogs")
+            latest = catalog.latest()
+            segments = catalog.files(latest["session"]) if latest else latest_session("TelemetryLogs")
+            if segments:
+                self.replayer.start_replay(segments, speed=2.0)
+
+    def trigger_ghost_race(self, runs=3, align="distance"):
+        # Previous drives from the session catalog, newest first (skipping the one being logged)
+        catalog = SessionCatalog("TelemetryLogs")
+        live = self.brain.logger.session if self.brain.logger is not None else None
+        sessions = [s["session"] for s in catalog.sessions(limit=runs + 1) if s["session"] != live][:runs]
+        ghost_runs = [catalog.files(session) for session in sessions]
+        self.replayer.start_ghost_mode([r for r in ghost_runs if r], self.handle_ghost_deltas, align)
+
+    def handle_ghost_deltas(self, deltas):
+        # One line per ghost (G1 = last run): live minus ghost, and the time/distance gap
+        unit = "s" if self.replayer.ghosts.align == "distance" else "m"
+        self.ghost_lbl.text = "\n".join(
+            f"G{i + 1}: {d['gap']:+.1f}{unit}  {d['speed']:+.0f} km/h  {d['rpm']:+.0f} rpm  {d['hp']:+.0f} hp"
+            + (" (done)" if d["finished"] else "") for i, d in enumerate(deltas))
 
     def update_ui_from_metrics(self, m):
         # [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, fuel_total, stability]
@@ -630,7 +523,7 @@ class PrunerDashApp(App):
         
         return layout
     
-    def manual_reconnect(self):
+    def manual_reconnect(self, port=None):
         # 1. Kill the old connection if it exists
         if self.connection:
             try:
@@ -639,8 +532,12 @@ class PrunerDashApp(App):
                 pass
 
         # 2. Attempt new connection
-        # If a port is selected from the BT window, we target it specifically
-        self.connection = get_connection()
+        # If a port is selected from the BT window, the worker connects to it (off the UI thread)
+        if port is not None:
+            self.connection = None
+            self.adapter_port = port
+        else:
+            self.connection = get_connection()
         
         # 3. Update the Global State & Badge
         self.refresh_connection_status()
@@ -662,20 +559,56 @@ class PrunerDashApp(App):
         
         threading.Thread(target=connect).start()
 
+    def connect_adapter(self, port):
+        """ Opens the adapter picked in the BT window (worker thread). Returns the connection or None """
+        try:
+            # Attempt 1: Real Car (cached protocol/PIDs first, full probe on failure)
+            self.connect_started = time.monotonic()
+            conn = probe_cache.connect(port, raw=USE_RAW_TRANSPORT)
+            if conn.is_connected():
+                self.system_state["has_adapter"] = True
+                self.system_state["mode"] = "LIVE"
+                self.is_mock = False
+                print(f"✅ REAL CAR DETECTED AND CONNECTED ON {port}")
+                # Remember it so the next scan tries this adapter first
+                self.store.put('last_adapter', port=port)
+                return conn
+        except Exception as e:
+            print(f"Connection Error on {port}: {e}")
+        # Attempt 2. Try WiFi (Common Address)
+        # connection_string="192.168.0.10:35000" is standard for many WiFi dongles
+        wifi_conn = obd.OBD(connection_string="192.168.0.10:35000")
+        if wifi_conn.is_connected():
+            self.system_state["has_adapter"] = True
+            self.system_state["mode"] = "LIVE"
+            print("Connected via WiFi")
+            return wifi_conn
+        self.connect_started = None
+        return None
+
     def background_worker(self):
         """ Runs in a separate thread to handle slow OBD communication """
         while not self.stop_thread:
             try:
+                # Adapter picked in the BT window: connect here, the first-sample timer starts with it
+                if self.adapter_port is not None:
+                    port, self.adapter_port = self.adapter_port, None
+                    self.connection = self.connect_adapter(port)
                 # Always check if we have a valid, active connection
                 if self.connection and self.connection.is_connected():
+                    tick_start = time.monotonic()
                     # Perform the OBD queries and math
                     self.latest_metrics = self.brain.process_data(self.connection)
+                    if self.connect_started is not None:
+                        print(f"⏱ Time to first sample: {time.monotonic() - self.connect_started:.2f}s")
+                        self.connect_started = None
                     metrics = [rpm, speed, hp, torque, ve, fuel_rate, coolant, load, fuel_total, stability, temp_in] = self.latest_metrics
                     extra = calculate_extra_metrics(metrics)
-                    # Send both to the UI
-                    Clock.schedule_once(lambda dt: self.update_ui(metrics, extra))
-                    # Dashboard speed: 10 times per second
-                    time.sleep(0.1) 
+                    # Hand both to the UI (overwrites any sample the UI has not shown yet)
+                    self.snapshot.publish((metrics, extra), stamp=self.brain.sample_time)
+                    # No fixed sleep: go as fast as the adapter answers, capped by the pacer
+                    # ceiling/backoff, and never before the scheduler has a PID due
+                    time.sleep(max(self.brain.pacer.delay(tick_start), self.brain.scheduler.next_due_in()))
                 else:
                     # No connection? Wait longer before checking again to save battery
                     time.sleep(2.0)
@@ -692,6 +625,21 @@ class PrunerDashApp(App):
             except:
                 pass
 
+    def show_latest_snapshot(self, dt):
+        """ Display-rate UI tick: draws only the newest worker sample """
+        frame = self.snapshot.take()
+        if frame is None:
+            return
+        self.system_state["frames_coalesced"] = self.snapshot.coalesced
+        self.system_state["display_lag_ms"] = self.snapshot.lag * 1000
+        if self.brain.logger is not None:
+            self.system_state["log_dropped"] = self.brain.logger.dropped
+        metrics, extra = frame
+        # Live sample: it is both the displayed and the live set
+        self.update_ui(metrics, metrics, extra)
+        if self.replayer.ghosts and self.brain.sample_time is not None:
+            self.replayer.ghost_step(metrics, self.brain.sample_time)
+
     def update_ui(self, m, live_m, extra):
         """ Reads the latest data from the thread and updates screen """
         try:
@@ -707,7 +655,7 @@ class PrunerDashApp(App):
         except:
             self.update_ui_from_metrics(m) # Update the UI from the replayer's data
 
-        keys = ["RPM", "Speed", "HP", "Torque Nm", "VE %", "Fuel L/h", "Coolant C", "Load %", "Total Fuel", "Stability", "Tepm_in"]
+        keys = ["RPM", "Speed", "HP", "Torque Nm", "VE %", "Fuel L/h", "Coolant C", "Load %", "Total Fuel", "Stability", "Temp_In"]
         # 1. Update primary gauges with live data
         self.update_ui_from_metrics(live_m)
         
@@ -804,5 +752,9 @@ class PrunerDashApp(App):
             self.worker_thread.join(timeout=1.0)
             print("Background thread stopped.")
 
+        # 4. Save the learned maps (periodic saves cover crashes and kills) and flush the log
+        if hasattr(self, 'brain'):
+            self.brain.close()
+
 if __name__ == "__main__":
     PrunerDashApp().run()
\ No newline at end of file
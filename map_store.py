@@ -0,0 +1,174 @@
+# map_store.py
+# Learned maps saved per vehicle as one memory-mapped file, so the next drive starts
+# from what the last one learned. Loading maps the file (no read/parse, instant at any
+# resolution); saving writes only the cells that changed, through a journal, so an
+# unclean process kill never leaves a half-written map behind.
+import json
+import os
+import re
+import struct
+import zlib
+
+import numpy as np
+
+MAPS_DIR = "LearnedMaps"
+MAGIC = b"PDMAPS1\n"
+JOURNAL_MAGIC = b"PDJ1"
+PAGE = 4096
+
+
+def map_path(vehicle, base_dir=None):
+    """LearnedMaps/<vehicle>.maps (vehicle name made filename-safe)."""
+    base_dir = base_dir or os.path.join(os.getcwd(), MAPS_DIR)
+    safe = re.sub(r"[^A-Za-z0-9_.-]+", "_", vehicle).strip("_") or "Default"
+    return os.path.join(base_dir, safe + ".maps")
+
+
+class MapStore:
+    """
+    File layout: MAGIC, u32 header length, JSON layout (the maps, their axes and offsets),
+    padding to a page boundary, then three float64 arrays (count, mean, M2) of every cell.
+
+    The engine works on a copy-on-write mapping of the file: learning only touches private
+    memory. checkpoint() first writes the dirty cells to <file>.journal (checksummed,
+    fsynced), then into the file, then removes the journal. A kill before the journal is
+    complete loses only the last interval; a kill after it is replayed on the next load.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.journal = path + ".journal"
+        self.engine = None
+        self.file = None
+
+    # --- loading ---
+    def attach(self, engine):
+        """Backs engine's arrays with the file (created or migrated as needed). Register maps first."""
+        layout = self._layout(engine)
+        total = len(engine.count)
+        stored = self._read_layout() if os.path.exists(self.path) else None
+        if stored is None:
+            self._create(layout, total)
+        elif stored != layout:
+            self._migrate(stored, layout, total)
+
+        offset = self._data_offset(layout)
+        self.file = np.memmap(self.path, dtype="<f8", mode="r+", offset=offset, shape=(3, total))
+        self._replay_journal()
+
+        cells = np.memmap(self.path, dtype="<f8", mode="c", offset=offset, shape=(3, total))
+        engine.count, engine.mean, engine.m2 = cells[0], cells[1], cells[2]
+        engine.dirty[:] = False
+        self.engine = engine
+        return self
+
+    @staticmethod
+    def _layout(engine):
+        maps = [{"name": m.name, "value": m.value, "axes": [list(a.key) for a in m.axes],
+                 "offset": m.offset, "size": m.size} for m in engine.maps.values()]
+        # Through JSON once, so it compares equal to what _read_layout() returns
+        return json.loads(json.dumps(maps))
+
+    @staticmethod
+    def _header(layout):
+        text = json.dumps(layout).encode()
+        return MAGIC + struct.pack("<I", len(text)) + text
+
+    def _data_offset(self, layout):
+        return -(-len(self._header(layout)) // PAGE) * PAGE
+
+    def _read_layout(self):
+        try:
+            with open(self.path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    raise ValueError("not a map file")
+                (length,) = struct.unpack("<I", f.read(4))
+                return json.loads(f.read(length))
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Map file {self.path} unreadable ({e}), starting fresh")
+            return None
+
+    def _create(self, layout, total, cells=None):
+        """Writes a complete new file next to the old one, then swaps it in."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = self.path + ".tmp"
+        offset = self._data_offset(layout)
+        with open(tmp, "wb") as f:
+            f.write(self._header(layout).ljust(offset, b" "))
+            data = np.zeros((3, total), dtype="<f8") if cells is None else cells
+            f.write(data.astype("<f8").tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        if os.path.exists(self.journal):
+            os.remove(self.journal) # Belonged to the old layout
+
+    def _migrate(self, stored, layout, total):
+        """Maps were added/changed since the file was written: keep the ones that still match."""
+        self._replay_journal(stored)
+        old = np.memmap(self.path, dtype="<f8", mode="r", offset=self._data_offset(stored),
+                        shape=(3, sum(m["size"] for m in stored)))
+        cells = np.zeros((3, total), dtype="<f8")
+        by_name = {m["name"]: m for m in stored}
+        for m in layout:
+            prev = by_name.get(m["name"])
+            if prev and prev["axes"] == m["axes"] and prev["value"] == m["value"]:
+                cells[:, m["offset"]:m["offset"] + m["size"]] = old[:, prev["offset"]:prev["offset"] + prev["size"]]
+        del old
+        self._create(layout, total, cells)
+
+    def _replay_journal(self, layout=None):
+        """Re-applies a complete journal left by a checkpoint that was interrupted."""
+        if not os.path.exists(self.journal):
+            return
+        with open(self.journal, "rb") as f:
+            raw = f.read()
+        header = struct.calcsize("<4sII")
+        if len(raw) >= header:
+            magic, n, crc = struct.unpack_from("<4sII", raw)
+            payload = raw[header:header + n * 32]
+            if magic == JOURNAL_MAGIC and len(payload) == n * 32 and zlib.crc32(payload) == crc:
+                idx = np.frombuffer(payload[:n * 8], dtype="<i8")
+                values = np.frombuffer(payload[n * 8:], dtype="<f8").reshape(3, n)
+                if layout is None:
+                    self._apply(self.file, idx, values)
+                else:
+                    total = sum(m["size"] for m in layout)
+                    target = np.memmap(self.path, dtype="<f8", mode="r+",
+                                       offset=self._data_offset(layout), shape=(3, total))
+                    self._apply(target, idx, values)
+                    del target
+        # Torn (incomplete) journals are simply dropped: the file still holds the previous checkpoint
+        os.remove(self.journal)
+
+    @staticmethod
+    def _apply(target, idx, values):
+        target[:, idx] = values
+        target.flush()
+
+    # --- saving ---
+    def checkpoint(self):
+        """Writes the cells changed since the last checkpoint. Returns how many."""
+        engine = self.engine
+        idx = np.flatnonzero(engine.dirty)
+        if not len(idx):
+            return 0
+        values = np.stack((engine.count[idx], engine.mean[idx], engine.m2[idx])).astype("<f8")
+        payload = idx.astype("<i8").tobytes() + values.tobytes()
+        try:
+            with open(self.journal, "wb") as f:
+                f.write(struct.pack("<4sII", JOURNAL_MAGIC, len(idx), zlib.crc32(payload)) + payload)
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(self.file, idx, values)
+            os.remove(self.journal)
+        except OSError as e:
+            print(f"Map checkpoint failed: {e}")
+            return 0
+        engine.dirty[idx] = False
+        return len(idx)
+
+    def close(self):
+        if self.engine is not None:
+            self.checkpoint()
+        self.file = None
@@ -0,0 +1,232 @@
+# maps.py
+# Operating-point maps that learn: fuel rate over RPM x load, VE, fuel trim, ... Every cell
+# keeps a sample count, running mean and variance (Welford), optionally with exponential
+# forgetting. All maps live in one flat set of arrays inside a MapEngine, so a sample is
+# binned once per axis and every map is updated by the same handful of array operations.
+import numpy as np
+
+
+class Axis:
+    """
+    One map dimension: a channel of the sample binned as (value - bottom) // step.
+    Values past the top land in the last bin; values below the bottom (or missing) are dropped.
+    """
+
+    def __init__(self, channel, step, top, bottom=0.0):
+        self.channel = channel
+        self.step = step
+        self.top = top
+        self.bottom = bottom
+        self.size = int((top - bottom) // step) + 1
+
+    @property
+    def key(self):
+        return (self.channel, self.step, self.top, self.bottom)
+
+    def bin(self, value):
+        """Bin of one value, -1 if it is off the axis."""
+        if value is None or not value >= self.bottom:
+            return -1
+        return min(int((value - self.bottom) // self.step), self.size - 1)
+
+    def bins(self, values):
+        values = np.asarray(values, dtype=float)
+        out = np.minimum(np.floor_divide(values - self.bottom, self.step), self.size - 1)
+        out[~(values >= self.bottom)] = -1 # Below the axis, or NaN
+        return out.astype(int)
+
+
+class OperatingMap:
+    """
+    One registered map: a view into the engine's arrays, shaped like its axes.
+    decay=None: plain running mean/variance over every sample the cell has seen.
+    decay=0.99: each new sample in a cell scales that cell's history by 0.99, so the
+    cell tracks changes (new fuel, a fixed leak) and count saturates at 1 / (1 - decay).
+    """
+    # Hits at which a cell reads as 50% confident
+    CONFIDENCE_HITS = 10
+
+    def __init__(self, engine, name, value, axes, offset, decay=None):
+        self.engine = engine
+        self.name = name
+        self.value = value
+        self.axes = axes
+        self.offset = offset
+        self.decay = decay
+        self.shape = tuple(axis.size for axis in axes)
+        self.size = int(np.prod(self.shape))
+
+    def _view(self, array):
+        return array[self.offset:self.offset + self.size].reshape(self.shape)
+
+    @property
+    def count(self):
+        """Samples (effective, with decay) per cell."""
+        return self._view(self.engine.count)
+
+    @property
+    def mean(self):
+        return self._view(self.engine.mean)
+
+    @property
+    def m2(self):
+        """Sum of squared deviations (Welford)."""
+        return self._view(self.engine.m2)
+
+    def cell(self, *values):
+        """Index tuple of the cell for one value per axis, or None if it falls off the map."""
+        bins = tuple(axis.bin(v) for axis, v in zip(self.axes, values))
+        return None if min(bins) < 0 else bins
+
+    # --- views for the UI ---
+    @property
+    def variance(self):
+        out = np.zeros(self.shape)
+        np.divide(self.m2, self.count, out=out, where=self.count > 0)
+        return out
+
+    @property
+    def coverage(self):
+        """Fraction of cells that have seen at least one sample."""
+        return float(np.count_nonzero(self.count)) / self.size
+
+    @property
+    def confidence(self):
+        """0..1 per cell: 0 = never hit, 0.5 at CONFIDENCE_HITS samples, -> 1 with more."""
+        return self.count / (self.count + self.CONFIDENCE_HITS)
+
+    def layer(self, name):
+        """Array for the widget: "mean", "std", "count", "hits" (0/1) or "confidence"."""
+        if name == "mean":
+            return self.mean
+        if name == "std":
+            return np.sqrt(self.variance)
+        if name == "count":
+            return self.count
+        if name == "hits":
+            return (self.count > 0).astype(float)
+        if name == "confidence":
+            return self.confidence
+        raise ValueError(f"Unknown map layer: {name}")
+
+
+class MapEngine:
+    """
+    Registry of OperatingMaps fed from one sample dict ({channel: value}) at a time,
+    or from columns ({channel: array}) in a batch.
+
+    Axes shared by several maps (same channel and bins) are binned once. Each map's cell
+    is then offset + sum(bin * stride), computed for all maps with one matrix product.
+    """
+
+    def __init__(self):
+        self.maps = {}
+        self.axes = []          # Distinct axes, in registration order
+        self.channels = []      # Distinct value channels
+        self.count = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.m2 = np.zeros(0)
+        self.dirty = np.zeros(0, dtype=bool) # Cells changed since the last save (map_store)
+        self._build()
+
+    def register(self, name, value, axes, decay=None):
+        """Adds a map of channel `value` over `axes` (list of Axis). Returns the OperatingMap."""
+        if name in self.maps:
+            raise ValueError(f"Map already registered: {name}")
+        m = OperatingMap(self, name, value, axes, len(self.count), decay)
+        self.maps[name] = m
+        for axis in axes:
+            if axis.key not in [a.key for a in self.axes]:
+                self.axes.append(axis)
+        if value not in self.channels:
+            self.channels.append(value)
+        self.count = np.concatenate((self.count, np.zeros(m.size)))
+        self.mean = np.concatenate((self.mean, np.zeros(m.size)))
+        self.m2 = np.concatenate((self.m2, np.zeros(m.size)))
+        self.dirty = np.concatenate((self.dirty, np.zeros(m.size, dtype=bool)))
+        self._build()
+        return m
+
+    def __getitem__(self, name):
+        return self.maps[name]
+
+    def _build(self):
+        """Per-map lookup tables: strides over the distinct axes, offsets, value channel, decay."""
+        maps = list(self.maps.values())
+        keys = [a.key for a in self.axes]
+        self._strides = np.zeros((len(maps), len(self.axes)), dtype=int)
+        for i, m in enumerate(maps):
+            stride = 1
+            for axis in reversed(m.axes): # Row-major, like the map's reshape
+                self._strides[i, keys.index(axis.key)] = stride
+                stride *= axis.size
+        # An off-axis bin of -total drags the cell of every map using that axis below 0
+        # (offset + highest in-map index < total), so one sign test finds the misses
+        self._off_map = -max(1, len(self.count))
+        self._offsets = np.array([m.offset for m in maps], dtype=int)
+        self._value_index = np.array([self.channels.index(m.value) for m in maps], dtype=int)
+        self._keep = np.array([1.0 if m.decay is None else m.decay for m in maps])
+        self._decayed = any(m.decay is not None for m in maps)
+
+    def update(self, sample):
+        """Adds one sample ({channel: value or None}) to every map whose channels it has."""
+        if not self.maps:
+            return
+        bins = np.array([axis.bin(sample.get(axis.channel)) for axis in self.axes])
+        bins[bins < 0] = self._off_map
+        values = np.array([np.nan if sample.get(c) is None else sample[c] for c in self.channels],
+                          dtype=float)[self._value_index]
+        cells = self._offsets + self._strides @ bins
+        ok = (cells >= 0) & ~np.isnan(values)
+
+        c, x, keep = cells[ok], values[ok], self._keep[ok]
+        n = self.count[c] = keep * self.count[c] + 1
+        delta = x - self.mean[c]
+        self.mean[c] += delta / n
+        self.m2[c] = keep * self.m2[c] + delta * (x - self.mean[c])
+        self.dirty[c] = True
+
+    def update_batch(self, columns):
+        """
+        Adds many samples ({channel: array}, NaN = missing). Same result as update() per
+        sample, up to float rounding. With decaying maps the order of hits within a cell
+        matters, so those batches go through update() one sample at a time.
+        """
+        if not self.maps:
+            return
+        n = len(next(iter(columns.values())))
+        missing = np.full(n, np.nan)
+
+        def column(channel):
+            return np.asarray(columns[channel], dtype=float) if channel in columns else missing
+
+        if self._decayed:
+            names = list(columns)
+            for row in zip(*(column(c).tolist() for c in names)):
+                self.update({c: None if v != v else v for c, v in zip(names, row)})
+            return
+
+        bins = np.column_stack([axis.bins(column(axis.channel)) for axis in self.axes])
+        bins[bins < 0] = self._off_map
+        values = np.column_stack([column(c) for c in self.channels])[:, self._value_index]
+        cells = bins @ self._strides.T + self._offsets
+        ok = (cells >= 0) & ~np.isnan(values)
+        flat, x = cells[ok], values[ok]
+        size = self.count.size
+
+        # Per-cell stats of the batch, then merged into the maps (Chan et al. parallel update)
+        n_b = np.bincount(flat, minlength=size).astype(float)
+        hit = n_b > 0
+        mean_b = np.zeros(size)
+        mean_b[hit] = np.bincount(flat, weights=x, minlength=size)[hit] / n_b[hit]
+        dev = x - mean_b[flat]
+        m2_b = np.bincount(flat, weights=dev * dev, minlength=size)
+
+        n_a = self.count[hit]
+        mean_a = self.mean[hit]
+        total = n_a + n_b[hit]
+        delta = mean_b[hit] - mean_a
+        self.count[hit] = total
+        self.mean[hit] = mean_a + delta * n_b[hit] / total
+        self.m2[hit] = self.m2[hit] + m2_b[hit] + delta * delta * n_a * n_b[hit] / total
+        self.dirty |= hit
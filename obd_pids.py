@@ -0,0 +1,79 @@
+# obd_pids.py
+# Standard Mode 01 PIDs used by the dashboard, with plain-float decoders.
+# Names match python-obd's obd.commands so both paths can share one key set.
+
+# name: (pid, data bytes, decoder)
+PID_TABLE = {
+    "ENGINE_LOAD":       (0x04, 1, lambda d: d[0] * 100.0 / 255),
+    "COOLANT_TEMP":      (0x05, 1, lambda d: d[0] - 40.0),
+    "SHORT_FUEL_TRIM_1": (0x06, 1, lambda d: (d[0] - 128) * 100.0 / 128),
+    "RPM":               (0x0C, 2, lambda d: ((d[0] << 8) | d[1]) / 4.0),
+    "SPEED":             (0x0D, 1, lambda d: float(d[0])),
+    "INTAKE_TEMP":       (0x0F, 1, lambda d: d[0] - 40.0),
+    "MAF":               (0x10, 2, lambda d: ((d[0] << 8) | d[1]) / 100.0),
+}
+
+# Inverse formulas (physical value -> raw bytes), used by the ELM327 emulator
+PID_ENCODERS = {
+    "ENGINE_LOAD":       lambda v: [round(v * 255 / 100)],
+    "COOLANT_TEMP":      lambda v: [round(v) + 40],
+    "SHORT_FUEL_TRIM_1": lambda v: [round(v * 128 / 100) + 128],
+    "RPM":               lambda v: list(divmod(round(v * 4), 256)),
+    "SPEED":             lambda v: [round(v)],
+    "INTAKE_TEMP":       lambda v: [round(v) + 40],
+    "MAF":               lambda v: list(divmod(round(v * 100), 256)),
+}
+
+# Reverse lookup: pid byte -> name
+PID_NAMES = {pid: name for name, (pid, _, _) in PID_TABLE.items()}
+
+# Single-byte PIDs are precomputed for all 256 raw values: decoding is one index
+_LOOKUP = {
+    pid: tuple(decoder((b,)) for b in range(256))
+    for name, (pid, nbytes, decoder) in PID_TABLE.items() if nbytes == 1
+}
+
+# The PIDs TelemetryBrain needs for one sample
+DEFAULT_PIDS = ["RPM", "SPEED", "MAF", "COOLANT_TEMP", "ENGINE_LOAD", "SHORT_FUEL_TRIM_1", "INTAKE_TEMP"]
+
+# Target poll rate (Hz) per PID: fast-changing signals first, temperatures barely move
+DEFAULT_RATES = {
+    "RPM": 20.0, "SPEED": 20.0, "MAF": 20.0,
+    "ENGINE_LOAD": 5.0, "SHORT_FUEL_TRIM_1": 5.0,
+    "COOLANT_TEMP": 0.5, "INTAKE_TEMP": 0.5,
+}
+
+
+def batch_command_bytes(names):
+    """Builds a multi-PID Mode 01 request, e.g. ['RPM', 'SPEED'] -> b'010C0D'"""
+    return b"01" + "".join(f"{PID_TABLE[n][0]:02X}" for n in names).encode()
+
+
+def decode_mode01(data):
+    """
+    Walks a Mode 01 response payload (starting at the 0x41 byte) and returns {name: value}.
+    Works for single and multi-PID responses. Stops at the first unknown PID,
+    since its length (and therefore where the next PID starts) is unknown.
+    """
+    values = {}
+    if not data or data[0] != 0x41:
+        return values
+
+    i = 1
+    while i < len(data):
+        pid = data[i]
+        name = PID_NAMES.get(pid)
+        if name is None:
+            break
+        lookup = _LOOKUP.get(pid)
+        if lookup is not None and i + 1 < len(data):
+            values[name] = lookup[data[i + 1]]
+            i += 2
+            continue
+        _, nbytes, decoder = PID_TABLE[name]
+        chunk = data[i + 1:i + 1 + nbytes]
+        if len(chunk) < nbytes:
+            break
+        values[name] = decoder(chunk)
+        i += 1 + nbytes
+    return values
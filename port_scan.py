@@ -0,0 +1,77 @@
+# port_scan.py
+# Background OBD adapter scan: probes candidate serial/Bluetooth ports in parallel
+# and reports each working port as soon as it is found (obd.scan_serial() blocks
+# until every port has been tried).
+import glob
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from obd.utils import try_port
+
+
+def candidate_ports():
+    """Same candidate list as obd.scan_serial(), without probing."""
+    if sys.platform.startswith('linux') or sys.platform.startswith('cygwin'):
+        return glob.glob("/dev/rfcomm[0-9]*") + glob.glob("/dev/ttyUSB[0-9]*")
+    if sys.platform.startswith('win'):
+        return [r"\\.\COM%d" % i for i in range(256)]
+    if sys.platform.startswith('darwin'):
+        exclude = ['/dev/tty.Bluetooth-Incoming-Port', '/dev/tty.Bluetooth-Modem']
+        return [p for p in glob.glob('/dev/tty.*') if p not in exclude]
+    return []
+
+
+def _probe(port):
+    try:
+        return try_port(port)
+    except OSError:
+        return False
+
+
+class PortScanner:
+    """
+    Runs the scan in a daemon thread.
+    on_found(port) fires once per working port, on_done(ports) once at the end.
+    Both are called from the scan thread: UI code must hop back to the main thread.
+    The preferred port (last good adapter) is probed first and reported first if it works.
+    """
+
+    def __init__(self, on_found, on_done, preferred=None, workers=8):
+        self.on_found = on_found
+        self.on_done = on_done
+        self.preferred = preferred
+        self.workers = workers
+        self.cancelled = False
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self):
+        candidates = candidate_ports()
+        if self.preferred:
+            candidates = [self.preferred] + [p for p in candidates if p != self.preferred]
+
+        found = []
+        # The preferred adapter gets a head start so it tops the list when it works
+        if candidates and candidates[0] == self.preferred and _probe(self.preferred):
+            found.append(self.preferred)
+            self.on_found(self.preferred)
+        rest = candidates[1:] if self.preferred else candidates
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(_probe, p): p for p in rest}
+            for future in as_completed(futures):
+                if self.cancelled:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    break
+                if future.result():
+                    found.append(futures[future])
+                    self.on_found(futures[future])
+
+        if not self.cancelled:
+            self.on_done(found)
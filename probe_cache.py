@@ -0,0 +1,112 @@
+# probe_cache.py
+# Remembers what a full connect discovered (protocol, baud rate, supported PIDs) per adapter,
+# so the next connect can skip python-obd's protocol auto-detect and PID discovery.
+import json
+import os
+import time
+
+import obd
+from obd.utils import OBDStatus
+
+from elm_transport import RawELM327
+
+CACHE_FILE = "obd_probe_cache.json"
+
+
+class ProbeCache:
+    """
+    JSON file of {adapter address: {protocol, baudrate, supported, saved}}.
+    Keyed by the adapter address (serial port / BT MAC) because that is known before
+    connecting; the VIN can only be read once the protocol is already up.
+    """
+
+    def __init__(self, path=CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, protocol, baudrate=None, supported=None):
+        self.entries[key] = {
+            "protocol": protocol,
+            "baudrate": baudrate,
+            "supported": sorted(supported or []),
+            "saved": time.time(),
+        }
+        self._save()
+
+    def forget(self, key):
+        if self.entries.pop(key, None) is not None:
+            self._save()
+
+    def _save(self):
+        # Write-then-rename, so a crash never leaves half a JSON file behind
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"Probe cache save failed: {e}")
+
+
+class CachedOBD(obd.OBD):
+    """obd.OBD that takes its supported-command set from the cache instead of asking the car."""
+
+    def __init__(self, portstr, supported, **kwargs):
+        self.cached_supported = supported
+        super().__init__(portstr, **kwargs)
+
+    # Overrides python-obd's private discovery step (obd.OBD.__load_commands)
+    def _OBD__load_commands(self):
+        if self.status() != OBDStatus.CAR_CONNECTED:
+            return
+        for name in self.cached_supported:
+            if obd.commands.has_name(name):
+                self.supported_commands.add(obd.commands[name])
+
+
+def _baudrate(connection):
+    """Best effort: python-obd keeps its serial port private."""
+    try:
+        if isinstance(connection, RawELM327):
+            return connection.port.baudrate
+        return connection.interface._ELM327__port.baudrate
+    except AttributeError:
+        return None
+
+
+def connect(portstr, raw=False, cache=None):
+    """
+    Opens a connection to the adapter at portstr, trying cached settings first.
+    If the cached settings fail, the entry is dropped and a full probe refreshes it.
+    """
+    cache = cache or ProbeCache()
+    entry = cache.get(portstr)
+
+    if entry:
+        if raw:
+            conn = RawELM327(portstr, baudrate=entry["baudrate"] or 38400, protocol=entry["protocol"])
+        else:
+            conn = CachedOBD(portstr, entry["supported"], baudrate=entry["baudrate"], protocol=entry["protocol"])
+        if conn.is_connected():
+            return conn
+        print(f"⚠️ Cached settings for {portstr} failed. Re-probing...")
+        conn.close()
+        cache.forget(portstr)
+
+    # Full probe: protocol auto-detect (+ PID discovery for python-obd)
+    conn = RawELM327(portstr) if raw else obd.OBD(portstr)
+    if conn.is_connected():
+        if raw:
+            cache.put(portstr, conn.protocol_id, _baudrate(conn))
+        else:
+            cache.put(portstr, conn.protocol_id(), _baudrate(conn),
+                      [c.name for c in conn.supported_commands])
+    return conn
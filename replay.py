@@ -1,89 +1,133 @@
-import csv
+import time
+
+import binlog
+from ghosts import GhostOverlay
 from kivy.clock import Clock
 
 class TelemetryReplayer:
+    MIN_SPEED = 0.25
+    MAX_SPEED = 50.0
+    MAX_GAP = 2.0          # Longest recorded pause (log seconds) played back as-is
+    MIN_FRAME = 1.0 / 60   # Never reschedule faster than the screen refreshes
+
     def __init__(self, ui_update_callback):
         self.ui_update = ui_update_callback
         self.is_playing = False
         self._event = None
-        self.data = []
+        self.ghosts = None # GhostOverlay while racing recorded runs
+        self.cursor = None
+        self.speed = 1.0
 
-    def start_ghost_mode(self, file_path, ghost_ui_callback):
-        """Plays log data to a secondary UI callback without stopping live data"""
+    def start_ghost_mode(self, runs, ghost_ui_callback, align="distance"):
+        """
+        Loads several recorded runs (each a log path or its list of segments) as ghosts
+        next to the live data. The UI tick then calls ghost_step with the live metrics.
+        """
+        self.ghosts = GhostOverlay(align)
         self.ghost_callback = ghost_ui_callback
-        self._load_file(file_path[0])
-        self.current_index = 0
-        Clock.schedule_interval(self.ghost_step, 0.1)
+        for run in runs:
+            try:
+                self.ghosts.add(run)
+            except Exception as e:
+                print(f"Ghost Error: {e}")
+        if not self.ghosts.ghosts:
+            self.ghosts = None
 
-    def ghost_step(self, dt):
-        if self.current_index < len(self.data):
-            row = self.data[self.current_index]
-            # Send only key metrics for comparison
-            ghost_metrics = {
-                "rpm": float(row.get('rpm', 0)),
-                "speed": float(row.get('speed', 0)),
-                "hp": float(row.get('hp', 0)),
-                "torque": float(row.get('torque', 0)),
-                "ve": float(row.get('ve', 0)),
-                "fuel_rate": float(row.get('fuel_rate', 0)),
-                "coolant": float(row.get('coolant', 0)),
-                "load": float(row.get('load', 0)),
-                "fuel_total": float(row.get('fuel_total', 0)),
-                "stability": float(row.get('stability', 0))
-            }
-            self.ghost_callback(ghost_metrics)
-            self.current_index += 1
-            return True
-        return False
+    def ghost_step(self, live_metrics, t):
+        """Live metrics sampled at t (seconds) -> live-minus-ghost deltas to the ghost callback."""
+        if self.ghosts is None:
+            return False
+        self.ghost_callback(self.ghosts.update(live_metrics, t))
+        return True
 
-    def _load_file(self):
-        try:
-            with open(self.filepath, 'r') as f:
-                reader = csv.DictReader(f)
-                self.data = [row for row in reader]
-        except Exception as e:
-            print(f"Replay Error: {e}")
+    def stop_ghost_mode(self):
+        self.ghosts = None
 
     def start_replay(self, file_path, speed=1.0):
-        # We schedule the update based on the original log frequency
-        # Clock.schedule_interval(self.step, 0.1 / speed)
-        self.data = []
+        """
+        Streams the log from disk and shows each row at its recorded time, scaled by speed
+        (MIN_SPEED..MAX_SPEED). file_path: one log, or the list of segments of a drive.
+        """
+        self.stop_replay()
         try:
-            with open(file_path, 'r') as f:
-                reader = csv.DictReader(f)
-                self.data = list(reader)
-            
-            self.current_frame = 0
-            self.is_playing = True
-            # Playback at 10Hz (0.1s) to match original recording
-            self._event = Clock.schedule_interval(self._tick, 0.1)
+            self.cursor = binlog.LogCursor(file_path)
+            first = self.cursor.peek()
         except Exception as e:
             print(f"Replay Error: {e}")
+            return
+        if first is None:
+            print(f"Replay Error: {file_path} is empty")
+            return
+        self.speed = min(self.MAX_SPEED, max(self.MIN_SPEED, speed))
+        # Log time <-> wall time anchor: log_now = log_anchor + (now - wall_anchor) * speed
+        self._log_anchor = float(first['timestamp'])
+        self._wall_anchor = time.monotonic()
+        self.current_frame = 0
+        self.frames_skipped = 0 # Rows due within one screen frame (high speeds): only the last is drawn
+        self.is_playing = True
+        self._event = Clock.schedule_once(self._tick, 0)
+
+    def _log_now(self):
+        return self._log_anchor + (time.monotonic() - self._wall_anchor) * self.speed
+
+    def set_speed(self, speed):
+        """Changes the playback rate mid-replay without jumping."""
+        if self.is_playing:
+            self._log_anchor = self._log_now()
+            self._wall_anchor = time.monotonic()
+        self.speed = min(self.MAX_SPEED, max(self.MIN_SPEED, speed))
+
+    def seek(self, t):
+        """
+        Jumps to log time t (a timestamp as recorded; see duration() for the range) and shows
+        that frame. Works while playing or stopped, so a slider can scrub back and forth.
+        """
+        if self.cursor is None:
+            return
+        row = self.cursor.seek(t)
+        self.current_frame = self.cursor.position
+        self._log_anchor = t
+        self._wall_anchor = time.monotonic()
+        if row is not None:
+            self.ui_update(self._metrics(row))
+        if self.is_playing:
+            # Restart the tick from the new position
+            Clock.unschedule(self._event)
+            self._event = Clock.schedule_once(self._tick, 0)
+
+    def duration(self):
+        """(first, last) timestamp of the loaded drive, or (None, None)."""
+        return self.cursor.span() if self.cursor else (None, None)
 
     def _tick(self, dt):
-        if self.current_frame < len(self.data):
-            row = self.data[self.current_frame]
-            # [rpm, speed, hp, torque, ve, fuel, coolant, load, fuel_total, stability]
-            metrics_list = [
-                float(row.get('rpm', 0)),
-                float(row.get('speed', 0)),
-                float(row.get('hp', 0)),
-                float(row.get('torque', 0)),
-                float(row.get('ve', 0)),
-                float(row.get('fuel_rate', 0)),
-                float(row.get('coolant', 0)),
-                float(row.get('load', 0)),
-                float(row.get('fuel_total', 0)),
-                float(row.get('stability', 0)),
-                float(row.get('temp_in', 25))
-            ]
-            self.ui_update(metrics_list)
-            self.current_frame += 1
-        else:
+        if not self.is_playing:
+            return
+        log_now = self._log_now()
+        row, count = self.cursor.advance_to(log_now)
+        self.current_frame = self.cursor.position
+        if row is not None:
+            self.frames_skipped += count - 1
+            self.ui_update(self._metrics(row))
+
+        upcoming = self.cursor.peek()
+        if upcoming is None:
             self.stop_replay()
-            
+            return
+        wait = float(upcoming['timestamp']) - log_now
+        if wait > self.MAX_GAP:
+            # Pause between drives/segments: play it as MAX_GAP instead of waiting it out
+            self._log_anchor += wait - self.MAX_GAP
+            wait = self.MAX_GAP
+        self._event = Clock.schedule_once(self._tick, max(self.MIN_FRAME, wait / self.speed))
+
+    @staticmethod
+    def _metrics(row):
+        # [rpm, speed, hp, torque, ve, fuel, coolant, load, fuel_total, stability, temp_in]
+        # Records are in LOG_FIELDS order (.tlog and CSV cache): one tuple conversion, no lookups
+        return list(row.item()[1:])
+
     def stop_replay(self):
         self.is_playing = False
         if self._event:
             Clock.unschedule(self._event)
-            
\ No newline at end of file
+            self._event = None
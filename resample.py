@@ -0,0 +1,81 @@
+# resample.py
+# Aligns PIDs that were read at different times/rates onto one output timeline, so
+# HP/torque/VE are computed from RPM and MAF of the same instant instead of
+# "RPM from now, MAF from 200 ms ago".
+from collections import deque
+
+
+class SignalResampler:
+    """
+    Keeps a short (t, value) history per PID and emits frames on a fixed grid (rate Hz).
+
+    PIDs polled at least at the output rate are linearly interpolated; the output waits
+    until all of them have a sample past the frame time, so it lags by one of their
+    periods. Slower PIDs (load and trim at 5 Hz, coolant at 0.5 Hz) would hold every
+    frame back until their next reading, so they are held at their latest value instead.
+    If no PID is polled that fast (rate above every PID rate), the fastest ones gate the
+    output instead: frames still come out at `rate`, interpolated between their readings.
+    """
+
+    def __init__(self, rates, rate=20.0, history=2.0):
+        self.rate = rate
+        self.step = 1.0 / rate
+        self.history = history
+        gate = min(rate, max(rates.values()))
+        self.interpolated = [n for n, hz in rates.items() if hz >= gate]
+        self.held = [n for n in rates if n not in self.interpolated]
+        # Enough room for `history` seconds of the fastest PID
+        size = int(history * max(rates.values())) + 2
+        self.samples = {n: deque(maxlen=size) for n in rates}
+        self.next_t = None
+
+    def add(self, name, t, value):
+        """Adds one reading. Repeats of an already-stored timestamp are ignored."""
+        if value is None:
+            return
+        buf = self.samples[name]
+        if buf and t <= buf[-1][0]:
+            return
+        buf.append((t, value))
+
+    def clear(self, name):
+        """Forgets a PID (its reading went stale): frames report it as None until it is read again."""
+        self.samples[name].clear()
+
+    def value_at(self, name, t):
+        """Linear interpolation between the samples around t (hold at the ends)."""
+        buf = self.samples[name]
+        if not buf:
+            return None
+        if name in self.held or t >= buf[-1][0]:
+            return buf[-1][1]
+        # Frames are requested close to the newest data: search from the right
+        for i in range(len(buf) - 1, 0, -1):
+            t0, v0 = buf[i - 1]
+            if t0 <= t:
+                t1, v1 = buf[i]
+                return v0 + (v1 - v0) * (t - t0) / (t1 - t0)
+        return buf[0][1]
+
+    def horizon(self):
+        """Latest time every live interpolated PID has data for (None if nothing yet)."""
+        lasts = [self.samples[n][-1][0] for n in self.interpolated if self.samples[n]]
+        if not lasts:
+            return None
+        # A PID that went silent (NO DATA) must not freeze the output forever
+        newest = max(lasts)
+        live = [t for t in lasts if newest - t <= self.history]
+        return min(live)
+
+    def frames(self):
+        """Yields (t, {name: value}) for every grid time that is now fully covered."""
+        end = self.horizon()
+        if end is None:
+            return
+        if self.next_t is None or end - self.next_t > self.history:
+            # First frame, or we fell behind by more than the history holds: restart the grid
+            self.next_t = end
+        while self.next_t <= end:
+            t = self.next_t
+            yield t, {name: self.value_at(name, t) for name in self.samples}
+            self.next_t += self.step
@@ -0,0 +1,164 @@
+# rolling.py
+# Sliding-window statistics in O(1) per sample: mean/variance from running sums,
+# min/max from monotonic queues. Replaces "append, pop(0), np.std(whole window)"
+# for fuel-trim stability and any other windowed metric.
+import math
+from collections import deque
+
+import numpy as np
+
+
+class RollingStats:
+    """
+    Mean, variance/std (population, like np.std), min and max of the last `size` samples
+    and/or the samples from the last `seconds` (then add() needs the sample time t).
+
+    The running sums are kept relative to a shift value close to the data, which avoids
+    catastrophic cancellation in sum(x^2) - sum(x)^2/n, and are recomputed from the buffer
+    after every `size` (or 1000) evictions so rounding drift cannot build up.
+    """
+    RESYNC_EVERY = 1000
+
+    def __init__(self, size=None, seconds=None):
+        if size is None and seconds is None:
+            raise ValueError("RollingStats needs a window: size (samples) or seconds")
+        self.size = size
+        self.seconds = seconds
+        self.resync_every = size or self.RESYNC_EVERY
+        self.clear()
+
+    def clear(self):
+        self.samples = deque()  # (t, x) in arrival order
+        self._seq = 0           # Samples ever added; the newest one has number _seq
+        self._lo = deque()      # (seq, x), increasing x: front is the window minimum
+        self._hi = deque()      # (seq, x), decreasing x: front is the window maximum
+        self._shift = 0.0
+        self._sum = 0.0         # sum(x - shift)
+        self._sq = 0.0          # sum((x - shift)^2)
+        self._evictions = 0
+
+    # --- updates ---
+    def add(self, x, t=None):
+        if not self.samples:
+            self._shift = x
+        self._seq += 1
+        self.samples.append((t, x))
+        d = x - self._shift
+        self._sum += d
+        self._sq += d * d
+        self._push_extremes(self._seq, x)
+
+        while (self.size is not None and len(self.samples) > self.size) or \
+                (self.seconds is not None and t - self.samples[0][0] > self.seconds):
+            self._evict()
+
+    def _push_extremes(self, seq, x):
+        while self._lo and self._lo[-1][1] >= x:
+            self._lo.pop()
+        self._lo.append((seq, x))
+        while self._hi and self._hi[-1][1] <= x:
+            self._hi.pop()
+        self._hi.append((seq, x))
+
+    def _evict(self):
+        _, x = self.samples.popleft()
+        d = x - self._shift
+        self._sum -= d
+        self._sq -= d * d
+        first = self._seq - len(self.samples) + 1
+        while self._lo and self._lo[0][0] < first:
+            self._lo.popleft()
+        while self._hi and self._hi[0][0] < first:
+            self._hi.popleft()
+        self._evictions += 1
+        if self._evictions >= self.resync_every:
+            self._resync()
+
+    def _resync(self):
+        """Exact sums from the buffer, re-centred on the current mean."""
+        self._evictions = 0
+        if not self.samples:
+            self._sum = self._sq = 0.0
+            return
+        self._shift = self.mean
+        self._sum = self._sq = 0.0
+        for _, x in self.samples:
+            d = x - self._shift
+            self._sum += d
+            self._sq += d * d
+
+    def extend(self, values, t=None):
+        """
+        Vectorized add() for many samples (TelemetryBrain.process_batch).
+        Returns (count, mean, std) arrays: the window stats right after each sample,
+        equal to add() one by one up to float rounding. The object ends in the same state.
+        """
+        x = np.asarray(values, dtype=float)
+        if len(x) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0), np.zeros(0)
+        old_t = [s for s, _ in self.samples]
+        new_t = [None] * len(x) if t is None else np.asarray(t, dtype=float).tolist()
+        all_x = np.concatenate(([v for _, v in self.samples], x))
+        k = len(old_t)
+
+        # Window of new sample i = all_x[starts[i]:ends[i]]
+        ends = np.arange(k + 1, k + len(x) + 1)
+        starts = np.zeros(len(x), dtype=int)
+        if self.size is not None:
+            starts = np.maximum(starts, ends - self.size)
+        if self.seconds is not None:
+            all_t = np.array(old_t + new_t, dtype=float)
+            starts = np.maximum(starts, np.searchsorted(all_t, all_t[ends - 1] - self.seconds, side="left"))
+
+        # Windowed sums as differences of shifted prefix sums
+        shift = all_x[0]
+        d = all_x - shift
+        s1 = np.concatenate(([0.0], np.cumsum(d)))
+        s2 = np.concatenate(([0.0], np.cumsum(d * d)))
+        count = ends - starts
+        mean_d = (s1[ends] - s1[starts]) / count
+        var = np.maximum(0.0, (s2[ends] - s2[starts]) / count - mean_d * mean_d)
+
+        # Leave the object as if every sample had gone through add()
+        self.samples = deque(list(zip(old_t + new_t, all_x.tolist()))[starts[-1]:])
+        self._seq += len(x)
+        self._lo.clear()
+        self._hi.clear()
+        base = self._seq - len(self.samples) + 1
+        for i, (_, v) in enumerate(self.samples):
+            self._push_extremes(base + i, v)
+        self._shift = self.samples[0][1]
+        self._sum = 0.0
+        self._resync()
+
+        return count, shift + mean_d, np.sqrt(var)
+
+    # --- statistics of the current window ---
+    @property
+    def count(self):
+        return len(self.samples)
+
+    @property
+    def mean(self):
+        n = len(self.samples)
+        return self._shift + self._sum / n if n else 0.0
+
+    @property
+    def var(self):
+        n = len(self.samples)
+        if not n:
+            return 0.0
+        m = self._sum / n
+        return max(0.0, self._sq / n - m * m)
+
+    @property
+    def std(self):
+        return math.sqrt(self.var)
+
+    @property
+    def min(self):
+        return self._lo[0][1] if self._lo else None
+
+    @property
+    def max(self):
+        return self._hi[0][1] if self._hi else None
@@ -0,0 +1,181 @@
+# session_catalog.py
+# SQLite index of the logged drives (TelemetryLogs/catalog.db): one row per session with
+# its time span, sample count, distance, top speed and fuel used, plus its segment files.
+# Listing drives or picking the latest one reads only this table, never the logs.
+import os
+import sqlite3
+from contextlib import contextmanager
+
+import numpy as np
+
+import binlog
+
+CATALOG_FILE = "catalog.db"
+
+
+class SessionStats:
+    """Running totals of one drive, fed with log rows as they are written."""
+    # Longer gaps between samples (pause, reconnect) add no distance
+    MAX_GAP = 5.0
+
+    def __init__(self):
+        self.start = None
+        self.end = None
+        self.samples = 0
+        self.distance_km = 0.0
+        self.max_speed = 0.0
+        self.first_fuel = None
+        self.last_fuel = None
+        self._last = None # (t, speed) of the previous row, to integrate across batches
+
+    @property
+    def fuel_used(self):
+        return 0.0 if self.first_fuel is None else self.last_fuel - self.first_fuel
+
+    def add_rows(self, rows):
+        """Log rows: [timestamp, rpm, speed, ..., fuel_total (index 9), ...]."""
+        if rows:
+            values = np.asarray(rows, dtype=float)
+            self.add(values[:, 0], values[:, 2], values[:, 9])
+
+    def add(self, t, speed, fuel_total):
+        if not len(t):
+            return
+        if self.start is None:
+            self.start = float(t[0])
+            self.first_fuel = float(fuel_total[0])
+        self.end = float(t[-1])
+        self.last_fuel = float(fuel_total[-1])
+        self.samples += len(t)
+        self.max_speed = max(self.max_speed, float(np.max(speed)))
+
+        if self._last is not None:
+            t = np.concatenate(([self._last[0]], t))
+            speed = np.concatenate(([self._last[1]], speed))
+        self._last = (float(t[-1]), float(speed[-1]))
+        dt = np.diff(t)
+        ok = (dt > 0) & (dt <= self.MAX_GAP)
+        # Trapezoid: km/h * s / 3600 = km
+        self.distance_km += float(np.sum(((speed[1:] + speed[:-1]) / 2 * dt)[ok])) / 3600
+
+
+class SessionCatalog:
+    """
+    Opens a short-lived connection per call, so the log writer, the housekeeping thread
+    and the UI can all use one catalog without sharing an sqlite3 connection.
+    """
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.path = os.path.join(base_dir, CATALOG_FILE)
+        with self._connect() as conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS sessions
+                (session INTEGER PRIMARY KEY, start_time REAL, end_time REAL, samples INTEGER,
+                 distance_km REAL, max_speed REAL, fuel_used REAL, closed INTEGER)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS segments
+                (name TEXT PRIMARY KEY, session INTEGER)''')
+            conn.execute("CREATE INDEX IF NOT EXISTS segments_by_session ON segments (session)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        try:
+            with conn: # Commit (or roll back) the call's statements
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, session, stats, segments, closed=True):
+        """Creates or updates a session row. segments: file names without .gz/.xz."""
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sessions VALUES (?,?,?,?,?,?,?,?)",
+                         (session, stats.start, stats.end, stats.samples, stats.distance_km,
+                          stats.max_speed, stats.fuel_used, int(closed)))
+            conn.executemany("INSERT OR REPLACE INTO segments VALUES (?,?)",
+                             [(name, session) for name in segments])
+
+    def sessions(self, limit=50, offset=0):
+        """Newest first, as dicts (for a log browser: page through with offset)."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute("SELECT * FROM sessions WHERE samples > 0 ORDER BY session DESC LIMIT ? OFFSET ?",
+                                (limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest(self):
+        rows = self.sessions(limit=1)
+        return rows[0] if rows else None
+
+    def files(self, session):
+        """
+        The session's segment paths in order, whichever of plain/.gz/.xz exists on disk
+        (and the .tlog of a CSV segment that was converted since).
+        """
+        with self._connect() as conn:
+            names = [row[0] for row in conn.execute(
+                "SELECT name FROM segments WHERE session = ? ORDER BY name", (session,))]
+        paths = []
+        suffixes = [""] + [s for s, _ in binlog.COMPRESSORS.values()]
+        for name in names:
+            stem, ext = os.path.splitext(name)
+            candidates = [stem + binlog.EXTENSION, name] if ext == ".csv" else [name]
+            path = next((p for p in (os.path.join(self.base_dir, c + s) for c in candidates for s in suffixes)
+                         if os.path.exists(p)), None)
+            if path:
+                paths.append(path)
+        return paths
+
+    def forget_files(self, paths):
+        """
+        Drops deleted segment files; sessions with no segment left go too, the others get
+        their totals recounted from the segments that remain.
+        """
+        names = [segment_name(p) for p in paths]
+        with self._connect() as conn:
+            sessions = {row[0] for name in names
+                        for row in conn.execute("SELECT session FROM segments WHERE name = ?", (name,))}
+            conn.executemany("DELETE FROM segments WHERE name = ?", [(n,) for n in names])
+            conn.execute("DELETE FROM sessions WHERE session NOT IN (SELECT DISTINCT session FROM segments)")
+        for session in sessions:
+            files = self.files(session)
+            if files:
+                self.update_stats(session, stats_from_files(files))
+
+    def update_stats(self, session, stats):
+        """Replaces a session's totals (its segments and closed flag stay)."""
+        with self._connect() as conn:
+            conn.execute("""UPDATE sessions SET start_time = ?, end_time = ?, samples = ?, distance_km = ?,
+                            max_speed = ?, fuel_used = ? WHERE session = ?""",
+                         (stats.start, stats.end, stats.samples, stats.distance_km,
+                          stats.max_speed, stats.fuel_used, session))
+
+    def pending(self):
+        """Sessions whose writer never closed them (app killed): their totals may be short."""
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT session FROM sessions WHERE closed = 0")}
+
+    def known(self):
+        with self._connect() as conn:
+            return {row[0] for row in conn.execute("SELECT session FROM sessions")}
+
+
+def segment_name(path):
+    """Log file name without the compression suffix (what the catalog stores)."""
+    name = os.path.basename(path)
+    for suffix, _ in binlog.COMPRESSORS.values():
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def stats_from_files(paths):
+    """Totals of a drive computed from its log files (catalog backfill)."""
+    stats = SessionStats()
+    for path in paths:
+        try:
+            records = binlog.read_log(path)
+        except Exception as e: # Unreadable or malformed log: catalog what the others hold
+            print(f"Catalog: skipped {path} ({e})")
+            continue
+        stats.add(records["timestamp"], records["speed"].astype(float), records["fuel_total"].astype(float))
+    return stats
@@ -0,0 +1,37 @@
+# snapshot.py
+# Single-slot channel between the OBD worker and the UI: the worker overwrites the
+# latest frame, the UI takes it at display rate. Frames the UI never saw are dropped
+# (and counted) instead of piling up as queued callbacks.
+import threading
+import time
+
+
+class LatestSnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._value = None
+        self._stamp = 0.0
+        self._seq = 0        # Frames published
+        self._read_seq = 0   # Last frame taken by the reader
+        self.coalesced = 0   # Frames overwritten before anyone read them
+        self.lag = 0.0       # Seconds from capture to take() for the last frame shown
+
+    def publish(self, value, stamp=None):
+        """
+        Producer side (worker thread): replace the latest frame.
+        stamp: monotonic time the data was captured (default: now), so lag covers sensor -> screen.
+        """
+        with self._lock:
+            self._value = value
+            self._stamp = time.monotonic() if stamp is None else stamp
+            self._seq += 1
+
+    def take(self):
+        """Consumer side (UI thread): newest frame, or None if nothing new since the last take."""
+        with self._lock:
+            if self._seq == self._read_seq:
+                return None
+            self.coalesced += self._seq - self._read_seq - 1
+            self._read_seq = self._seq
+            self.lag = time.monotonic() - self._stamp
+            return self._value